@@ -3,22 +3,32 @@
 # ├── data/
 # │   ├── Agroalimentaire/
 # │   │   └── 2023/
-# │   │       └── 01.xlsx, 02.xlsx, ...
-# │   └── Matériaux_de_construction/
-# │       └── 2024/03.xlsx, ...
+# │   │       └── 2023_01.xlsx, 2023_02.xlsx, ...
+# │   └── douane/
+# │       └── 2024/Douane_2024_03.xlsx, ...
 # └── requirements.txt
+#
+# Les fichiers mensuels se nomment [Préfixe_]AAAA_MM.xlsx. L'ancienne
+# convention MM.xlsx (ex: 2023/05.xlsx) reste lue, l'année venant du dossier ;
+# tout autre nom est refusé à l'import.
 
 import streamlit as st
-import pandas as pd
 import os
-import plotly.express as px
+from kiks_data import SchemaError, get_catalog, import_upload
+from kiks_data.charts import FREQUENCIES
+from kiks_data.cube import DATE_DIMENSION, DIMENSIONS, MEASURE, cube_for, describe
+from kiks_data.instrument import end_rerun, start_rerun
+from kiks_data.ui import analytics_panel, anomalies_panel, counts_figure, debug_panel, export_panel, filter_panel, histogram_figure, indicators_panel, jobs_panel, memory_panel, month_view, paged_table, plotly_chart, range_view, search_panel, series_figure
+from kiks_data.warmup import start_warmup
 
 # ======================== CONFIG ========================
 st.set_page_config(page_title="Analyse Douanière", layout="wide")
-
-# Footer fixed CSS
-def inject_footer():
-    st.markdown("""
+# Chronométrage de la relance (panneau admin + journal JSON)
+start_rerun("app")
+try:
+    # Footer fixed CSS
+    def inject_footer():
+        st.markdown("""
     <style>
         .footer {
             position: fixed;
@@ -37,124 +47,159 @@ def inject_footer():
     </div>
     """, unsafe_allow_html=True)
 
-# Sidebar branding
-def sidebar_footer():
-    st.sidebar.markdown("""
+    # Sidebar branding
+    def sidebar_footer():
+        st.sidebar.markdown("""
     ---
     🌐 **SDA Analytics Platform**
     📈 Suivi & Visualisation des échanges douaniers
     © 2025 SDA Consulting
     """)
 
-data_dir = "data"
-admin_password = "admin123"  # A sécuriser en prod
-
-# ==================== UTILS =====================
-def list_categories():
-    return [cat for cat in os.listdir(data_dir) if os.path.isdir(os.path.join(data_dir, cat))]
-
-def list_years(category):
-    path = os.path.join(data_dir, category)
-    return sorted([y for y in os.listdir(path) if os.path.isdir(os.path.join(path, y))])
-
-def list_months(category, year):
-    path = os.path.join(data_dir, category, year)
-    return sorted([f for f in os.listdir(path) if f.endswith(".xlsx")])
-
-def load_data(category, year, month_file):
-    path = os.path.join(data_dir, category, year, month_file)
-    return pd.read_excel(path)
-
-# ================== DASHBOARD ===================
-def show_dashboard(df):
-    st.markdown("## 📊 Tableau de bord interactif")
-    st.subheader("📌 Statistiques globales")
-    st.write(df.describe())
-
-    st.markdown("**🧠 Interprétation :**")
-    st.markdown("- Moyenne, Écart-type, Min/Max permettent une première lecture des tendances.")
-    st.divider()
-
-    colonnes_num = df.select_dtypes(include="number").columns.tolist()
-    if colonnes_num:
-        col_num = st.selectbox("🔢 Choisir une variable numérique :", colonnes_num)
-        fig = px.histogram(df, x=col_num, nbins=20, marginal="box", title=f"Distribution de {col_num}")
-        st.plotly_chart(fig, use_container_width=True)
-
-    colonnes_cat = df.select_dtypes(include="object").columns.tolist()
-    if colonnes_cat:
-        col_cat = st.selectbox("🏷️ Choisir une variable catégorielle :", colonnes_cat)
-        counts = df[col_cat].value_counts().reset_index()
-        fig_bar = px.bar(counts, x='index', y=col_cat, title=f"Répartition de {col_cat}")
-        st.plotly_chart(fig_bar, use_container_width=True)
-
-    colonnes_date = [c for c in df.columns if "date" in c.lower() or "mois" in c.lower()]
-    if colonnes_date and colonnes_num:
-        date_col = st.selectbox("🗓️ Colonne temporelle :", colonnes_date)
-        ts_col = st.selectbox("📉 Valeur à tracer :", colonnes_num)
-        try:
-            df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
-            df = df.dropna(subset=[date_col])
-            df = df.sort_values(date_col)
-            fig = px.line(df, x=date_col, y=ts_col, title=f"Évolution de {ts_col}")
-            st.plotly_chart(fig, use_container_width=True)
-        except:
-            st.warning("Erreur dans l'affichage temporel")
-
-# ===================== MAIN APP =====================
-st.title("📦 Analyse des Données Douanières")
-st.markdown("Choisissez une catégorie, une année, un mois pour afficher les données.")
-
-categories = list_categories()
-category = st.selectbox("📁 Choisissez une catégorie :", categories)
-
-if category:
-    years = list_years(category)
-    year = st.selectbox("📅 Choisissez une année :", years)
-
-    if year:
-        months = list_months(category, year)
-        month = st.selectbox("🗂️ Choisissez un fichier mensuel :", months)
-
-        if month:
-            df = load_data(category, year, month)
-            st.dataframe(df)
-
-            # 🔍 Filtres dynamiques
-            if st.checkbox("🔎 Activer les filtres"):
-                for col in df.columns:
-                    if df[col].dtype == 'object':
-                        filtre = st.multiselect(f"Filtrer {col}", options=df[col].unique())
-                        if filtre:
-                            df = df[df[col].isin(filtre)]
-                st.dataframe(df)
-
-            # 📊 Dashboard
-            if st.button("📊 Générer le tableau de bord"):
-                show_dashboard(df)
-
-# ================== IMPORT PAR ADMIN ===================
-st.sidebar.markdown("## 🔐 Importation admin")
-mdp = st.sidebar.text_input("Mot de passe", type="password")
-
-if mdp == admin_password:
-    st.sidebar.success("Connecté comme admin")
-    st.sidebar.markdown("### 📁 Importer un fichier")
-
-    new_category = st.sidebar.selectbox("Catégorie :", categories)
-    new_year = st.sidebar.selectbox("Année :", list_years(new_category))
-    new_month = st.sidebar.text_input("Nom du fichier (ex: 05.xlsx)")
-    new_file = st.sidebar.file_uploader("Uploader un fichier Excel", type=["xlsx"])
-
-    if st.sidebar.button("📄 Importer"):
-        if new_file and new_month:
-            path = os.path.join(data_dir, new_category, new_year, new_month)
-            with open(path, "wb") as f:
-                f.write(new_file.read())
-            st.sidebar.success(f"Fichier {new_month} importé avec succès !")
-        else:
-            st.sidebar.warning("Remplir tous les champs")
-
-# Injecter les bas de page
-inject_footer()
-sidebar_footer()
+    data_dir = "data"
+    catalog = get_catalog(data_dir)
+    # Préchargement en arrière-plan (une fois par processus) : la page s'affiche sans attendre
+    start_warmup(data_dir)
+    admin_password = "admin123"  # A sécuriser en prod
+
+    # ==================== UTILS =====================
+    def list_categories():
+        return catalog.categories()
+
+    def list_years(category):
+        return catalog.years(category)
+
+    def list_months(category, year):
+        return catalog.months(category, year)
+
+    def month_label(category, year, month_file):
+        # Nombre de lignes lu dans le catalogue, sans ouvrir le fichier
+        entry = catalog.entry(category, year, month_file)
+        if entry is None or entry["rows"] is None:
+            return month_file
+        return f"{month_file} — {entry['rows']} lignes"
+
+    def load_data(category, year, month_file):
+        path = os.path.join(data_dir, category, year, month_file)
+        return month_view(path, data_dir)
+
+    # ================== DASHBOARD ===================
+    def show_dashboard(df):
+        cube = cube_for(df)
+        st.markdown("## 📊 Tableau de bord interactif")
+        st.subheader("📌 Statistiques globales")
+        st.write(describe(cube))
+
+        st.markdown("**🧠 Interprétation :**")
+        st.markdown("- Moyenne, Écart-type, Min/Max permettent une première lecture des tendances.")
+        st.divider()
+
+        if not cube["hist"].empty:
+            fig = histogram_figure(cube, f"Distribution de {MEASURE}")
+            plotly_chart(fig)
+
+        colonnes_cat = [c for c in DIMENSIONS if c in df.columns]
+        if colonnes_cat:
+            col_cat = st.selectbox("🏷️ Choisir une variable catégorielle :", colonnes_cat)
+            fig_bar = counts_figure(cube, col_cat, f"Répartition de {col_cat}")
+            plotly_chart(fig_bar)
+
+        if DATE_DIMENSION in df.columns and MEASURE in df.columns:
+            pas = st.radio("⏱️ Pas de temps :", list(FREQUENCIES), horizontal=True)
+            fig = series_figure(cube, f"Évolution de {MEASURE}", FREQUENCIES[pas])
+            plotly_chart(fig)
+
+        # Agrégats du cube (nb et somme par dimension et par jour), sans relire les lignes
+        st.markdown("**📥 Exporter les agrégats**")
+        export_panel(cube["groups"], "agregats_tableau_de_bord", key="export_agregats", on_demand=False)
+
+    # ===================== MAIN APP =====================
+    st.title("📦 Analyse des Données Douanières")
+    st.markdown("Choisissez une catégorie, une année, un mois pour afficher les données.")
+    search_panel(data_dir)
+
+    categories = list_categories()
+    category = st.selectbox("📁 Choisissez une catégorie :", categories)
+
+    if category:
+        years = list_years(category)
+        year = st.selectbox("📅 Choisissez une année :", years)
+
+        if year:
+            months = list_months(category, year)
+            month = st.selectbox("🗂️ Choisissez un fichier mensuel :", months,
+                                 format_func=lambda m: month_label(category, year, m))
+
+            # None tant que la conversion du mois tourne en arrière-plan
+            df = load_data(category, year, month) if month else None
+            if df is not None:
+                paged_table(df, key="table")
+
+                # 🔍 Filtres dynamiques
+                if st.checkbox("🔎 Activer les filtres"):
+                    df = filter_panel(df)
+                    paged_table(df, key="table_filtre")
+                    export_panel(df, f"{category}_{os.path.splitext(month)[0]}", key="export_filtre")
+
+                # 📊 Dashboard
+                # Le bouton ne vaut True que pendant un rerun : le tableau de bord reste
+                # ouvert via la session pour que ses contrôles (pas de temps, variable) servent
+                if st.button("📊 Générer le tableau de bord"):
+                    st.session_state["tableau_de_bord"] = True
+                if st.session_state.get("tableau_de_bord"):
+                    show_dashboard(df)
+
+        # 📆 Analyse multi-mois / multi-années
+        if st.checkbox("📆 Analyse sur une période"):
+            range_view(category, data_dir)
+
+        # 📈 Indicateurs : variations MoM / YoY et moyennes mobiles par produit et flux
+        if st.checkbox("📈 Indicateurs mensuels"):
+            indicators_panel(category, data_dir)
+
+    # 🏆 Comparaisons entre catégories et classements sur toute la période
+    if st.checkbox("🏆 Comparaisons et classements"):
+        analytics_panel(data_dir)
+
+    # 🚨 Lignes aberrantes et ruptures de séries, détectées à l'ingestion
+    if st.checkbox("🚨 Anomalies"):
+        anomalies_panel(data_dir)
+
+    # ================== IMPORT PAR ADMIN ===================
+    st.sidebar.markdown("## 🔐 Importation admin")
+    mdp = st.sidebar.text_input("Mot de passe", type="password")
+
+    if mdp == admin_password:
+        st.sidebar.success("Connecté comme admin")
+        st.sidebar.markdown("### 📁 Importer un fichier")
+
+        new_category = st.sidebar.selectbox("Catégorie :", categories)
+        new_year = st.sidebar.selectbox("Année :", list_years(new_category))
+        new_month = st.sidebar.text_input("Nom du fichier (ex: 2024_05.xlsx)")
+        new_file = st.sidebar.file_uploader("Uploader un fichier Excel", type=["xlsx"])
+
+        if st.sidebar.button("📄 Importer"):
+            if new_file and new_month:
+                try:
+                    df_new = import_upload(new_file, new_category, new_year, new_month, data_dir)
+                    st.sidebar.success(f"Fichier {new_month} importé avec succès ! ({len(df_new)} lignes)")
+                except SchemaError as e:
+                    st.sidebar.error(f"Import refusé : {e}")
+            else:
+                st.sidebar.warning("Remplir tous les champs")
+
+        with st.sidebar.expander("⚙️ Tâches en arrière-plan"):
+            jobs_panel()
+
+        with st.sidebar.expander("🐞 Performances"):
+            debug_panel()
+
+        with st.sidebar.expander("🧠 Mémoire"):
+            memory_panel()
+
+    # Injecter les bas de page
+    inject_footer()
+    sidebar_footer()
+finally:
+    # Aussi après st.stop(), st.rerun() ou une exception : la relance est journalisée
+    end_rerun()
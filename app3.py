@@ -1,29 +1,29 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 from datetime import datetime
-from streamlit_extras.let_it_rain import rain
-from streamlit_pandas_profiling import st_profile_report
-from ydata_profiling import ProfileReport
+from kiks_data.instrument import end_rerun, start_rerun
+from kiks_data.schema import TRADE_SCHEMA
+from kiks_data.streaming import spool_upload, summarize_excel
+from kiks_data.ui import plotly_chart, profile_panel
 
 # ======================== CONFIG ========================
 st.set_page_config(page_title="Analyse Douanière", layout="wide")
-
-# =========== LIBS & SETUP POUR LE STYLE ================
-# === Logo en haut à gauche ===
-st.sidebar.image("kiks.jpeg", width=180)  # Logo SDA Academy
-
-# === Détecter le thème selon l'heure (sombre après 18h)
-now = datetime.now()
-dark_mode = now.hour >= 18 or now.hour < 6
-
-# === CSS Thème sombre ou clair + Design général ===
-theme_color = "#001f3f" if dark_mode else "#0077b6"
-bg_color = "#1e1e1e" if dark_mode else "#f4f9ff"
-text_color = "#ffffff" if dark_mode else "#003566"
-card_color = "#2a2a2a" if dark_mode else "#ffffff"
-
-st.markdown(f"""
+start_rerun("app3")
+try:
+    # =========== LIBS & SETUP POUR LE STYLE ================
+    # === Logo en haut à gauche ===
+    st.sidebar.image("kiks.jpeg", width=180)  # Logo SDA Academy
+
+    # === Détecter le thème selon l'heure (sombre après 18h)
+    now = datetime.now()
+    dark_mode = now.hour >= 18 or now.hour < 6
+
+    # === CSS Thème sombre ou clair + Design général ===
+    theme_color = "#001f3f" if dark_mode else "#0077b6"
+    bg_color = "#1e1e1e" if dark_mode else "#f4f9ff"
+    text_color = "#ffffff" if dark_mode else "#003566"
+    card_color = "#2a2a2a" if dark_mode else "#ffffff"
+
+    st.markdown(f"""
     <style>
         .main {{
             background-color: {bg_color};
@@ -64,36 +64,54 @@ st.markdown(f"""
     </style>
 """, unsafe_allow_html=True)
 
-# ============== AUTHENTIFICATION SIMPLE =================
-users = {"admin": "1234", "josias": "2025"}
-
-st.sidebar.title("🔐 Authentification")
-username = st.sidebar.text_input("Nom d'utilisateur")
-password = st.sidebar.text_input("Mot de passe", type="password")
-
-if username in users and users[username] == password:
-    st.success("Connexion réussie !")
-    rain(emoji="📦", font_size=28, falling_speed=3, animation_length="medium")
-
-    # ============== PAGE PRINCIPALE =================
-    st.title("📊 Kiks Consulting Analysis")
-
-    uploaded_file = st.file_uploader("Téléverser un fichier Excel", type=["xlsx"])
-
-    if uploaded_file is not None:
-        df = pd.read_excel(uploaded_file)
-        st.write("Aperçu des données :", df.head())
-
-        # ====== Graphiques interactifs ======
-        if "Pays" in df.columns and "Valeur FOB (USD)" in df.columns:
-            fig = px.bar(df, x="Pays", y="Valeur FOB (USD)", color="Pays",
-                         title="Valeur FOB par Pays")
-            st.plotly_chart(fig, use_container_width=True)
-
-        # ====== Analyse automatique avec ydata-profiling ======
-        st.subheader("📑 Rapport automatique")
-        profile = ProfileReport(df, explorative=True)
-        st_profile_report(profile)
-
-else:
-    st.warning("Veuillez entrer vos identifiants.")
+    # ============== AUTHENTIFICATION SIMPLE =================
+    users = {"admin": "1234", "josias": "2025"}
+
+    st.sidebar.title("🔐 Authentification")
+    username = st.sidebar.text_input("Nom d'utilisateur")
+    password = st.sidebar.text_input("Mot de passe", type="password")
+
+    if username in users and users[username] == password:
+        st.success("Connexion réussie !")
+        # Animation jouée une seule fois par session, pas à chaque rerun
+        if not st.session_state.get("rain_done"):
+            from streamlit_extras.let_it_rain import rain  # import à la demande (une fois par session)
+            rain(emoji="📦", font_size=28, falling_speed=3, animation_length="medium")
+            st.session_state.rain_done = True
+
+        # ============== PAGE PRINCIPALE =================
+        st.title("📊 Kiks Consulting Analysis")
+
+        uploaded_file = st.file_uploader("Téléverser un fichier Excel", type=["xlsx"])
+
+        if uploaded_file is not None:
+            # Lecture en flux : le classeur est écrit sur disque puis parcouru par
+            # blocs de lignes, sans jamais charger tout le DataFrame en mémoire.
+            chemin = spool_upload(uploaded_file, uploaded_file.file_id)
+            resume = summarize_excel(chemin, TRADE_SCHEMA, group_sums=[("Pays", "Valeur FOB (USD)")])
+            st.write("Aperçu des données :", resume.preview)
+            st.caption(f"{resume.n_rows} lignes lues")
+            manquantes = TRADE_SCHEMA.missing([] if resume.preview is None else resume.preview.columns)
+            if manquantes:
+                st.info(f"Colonnes absentes : {', '.join(manquantes)} — graphique FOB indisponible.")
+
+            # ====== Graphiques interactifs ======
+            fob = resume.sums.get(("Pays", "Valeur FOB (USD)"))
+            if fob is not None:
+                import plotly.express as px  # chargé au premier graphique seulement
+                fig = px.bar(fob.reset_index(), x="Pays", y="Valeur FOB (USD)", color="Pays",
+                             title="Valeur FOB par Pays")
+                plotly_chart(fig)
+
+            # ====== Analyse automatique avec ydata-profiling ======
+            st.subheader("📑 Rapport automatique")
+            if resume.n_rows == 0:
+                st.info("Le classeur ne contient aucune ligne de données : pas de rapport automatique.")
+            else:
+                profile_panel(resume.sample, auto=True, total_rows=resume.n_rows)
+
+    else:
+        st.warning("Veuillez entrer vos identifiants.")
+finally:
+    # Aussi après st.stop(), st.rerun() ou une exception : la relance est journalisée
+    end_rerun()
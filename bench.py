@@ -0,0 +1,258 @@
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pyarrow as pa
+
+import genere
+
+# Banc d'essai sans interface : génère des jeux de données de taille croissante
+# (genere.py), puis mesure dans un processus neuf par taille les chemins chauds
+# des pages : chargement, filtres, agrégats du tableau de bord, profiling,
+# et la taille des données envoyées au navigateur (graphiques, tableau).
+#
+#   python bench.py --tailles 1000,10000,50000 --baseline bench_baseline.json
+#   python bench.py --enregistrer-baseline   # fige la référence
+
+BENCH_DIR = os.path.join(os.environ.get("KIKS_CACHE_DIR", ".kiks_cache"), "bench")
+SECTEUR = "douane"
+ANNEE = 2020
+# En dessous de ce temps (s), un écart à la référence est considéré comme du bruit
+NOISE_FLOOR = 0.005
+
+
+# ===================== JEUX DE DONNÉES =====================
+def prepare_dataset(lignes, mois, graine, regenerer=False):
+    racine = os.path.join(BENCH_DIR, f"{lignes}_lignes_{mois}_mois_g{graine}")
+    data_dir = os.path.join(racine, "data")
+    if regenerer and os.path.exists(racine):
+        shutil.rmtree(racine)
+    if not os.path.isdir(data_dir):
+        for m in range(1, mois + 1):
+            genere.ecrit_mois(data_dir, SECTEUR, ANNEE, m, lignes, "xlsx", graine)
+    # Caches dérivés repartis de zéro à chaque mesure
+    cache_dir = os.path.join(racine, "cache")
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    return data_dir, cache_dir
+
+
+# ======================== CHRONOMÈTRE ========================
+def chrono(fn, repetitions, setup=None):
+    durees = []
+    for _ in range(repetitions):
+        if setup is not None:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        durees.append(time.perf_counter() - t0)
+    return {"median": round(statistics.median(durees), 6), "min": round(min(durees), 6), "runs": len(durees)}
+
+
+def _arrow_bytes(df):
+    # Taille du message Arrow : c'est le format utilisé par st.dataframe
+    sink = io.BytesIO()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.tell()
+
+
+def _figure_bytes(px, kind, df, x, y):
+    # JSON de la figure Plotly si disponible, sinon des seules données tracées
+    if px is None:
+        return len(df.to_json(orient="split", date_format="iso"))
+    return len(getattr(px, kind)(df, x=x, y=y).to_json())
+
+
+# ================= MESURES (processus enfant) =================
+def mesure(args):
+    # Importé ici : KIKS_DATA_DIR / KIKS_CACHE_DIR sont fixés par le parent
+    from kiks_data import apply_filters, distinct_values, frame_cache, get_catalog, load_month, read_range
+    from kiks_data.charts import downsample, resample_series
+    from kiks_data.config import PARQUET_DIR, PROFILE_DIR, PROFILE_SAMPLE_ROWS
+    from kiks_data.cube import DIMENSIONS, MEASURE, compute_cube, daily_series, describe, dimension_counts, histogram
+    from kiks_data.filters import filterable_columns
+    from kiks_data.profiling import render_profile
+    from kiks_data.table import page
+
+    try:
+        import plotly.express as px
+    except ImportError:
+        px = None
+
+    entries = sorted(get_catalog(watch=False).entries(SECTEUR), key=lambda e: e["period"])
+    paths = [e["path"] for e in entries]
+    r = args.repetitions
+    temps = {}
+
+    def froid():
+        frame_cache.clear()
+        shutil.rmtree(PARQUET_DIR, ignore_errors=True)
+
+    # --- load_data : Excel (premier affichage), miroir Parquet, cache mémoire
+    temps["load_excel"] = chrono(lambda: [load_month(p) for p in paths], r, setup=froid)
+    temps["load_parquet"] = chrono(lambda: [load_month(p) for p in paths], r, setup=frame_cache.clear)
+    temps["load_memoire"] = chrono(lambda: [load_month(p) for p in paths], r)
+
+    df = load_month(paths[0])
+
+    # --- boucle des filtres : options de chaque multiselect puis masque unique
+    colonnes = filterable_columns(df)
+    selections = {col: distinct_values(df, col)[: max(1, len(distinct_values(df, col)) // 2)]
+                  for col in colonnes[:2]}
+
+    def filtres():
+        for col in colonnes:
+            distinct_values(df, col)
+        return apply_filters(df, selections)
+
+    temps["filtres"] = chrono(filtres, r)
+    filtre = filtres()
+
+    # --- show_dashboard : agrégats calculés à la volée sur les lignes filtrées
+    def tableau_de_bord():
+        cube = compute_cube(filtre)
+        describe(cube)
+        histogram(cube)
+        for dim in DIMENSIONS:
+            dimension_counts(cube, dim)
+        return downsample(resample_series(daily_series(cube), "D"), "DATE", "somme")
+
+    temps["tableau_de_bord"] = chrono(tableau_de_bord, r)
+
+    # --- analyse sur une période : lecture de tous les mois en une requête
+    debut, fin = entries[0]["period"], entries[-1]["period"]
+    temps["periode"] = chrono(lambda: read_range(SECTEUR, debut, fin), r, setup=frame_cache.clear)
+    plage = read_range(SECTEUR, debut, fin)
+    temps["tableau_page"] = chrono(lambda: page(plage, 1, 50, sort_by=MEASURE, ascending=False), r)
+
+    # --- taille des données envoyées au navigateur
+    cube = compute_cube(filtre)
+    hist = histogram(cube)
+    hist["centre"] = (hist["debut"] + hist["fin"]) / 2
+    octets = {
+        "graphique_histogramme": _figure_bytes(px, "bar", hist, "centre", "nb"),
+        "graphique_repartition": _figure_bytes(px, "bar", dimension_counts(cube, DIMENSIONS[0]), DIMENSIONS[0], "nb"),
+        "graphique_serie": _figure_bytes(px, "line", tableau_de_bord(), "DATE", "somme"),
+        "tableau_page": _arrow_bytes(page(plage, 1, 50)),
+        "tableau_complet": _arrow_bytes(plage),
+    }
+
+    # --- profiling (une seule exécution : plusieurs secondes même échantillonné)
+    if not args.sans_profiling:
+        chemin = os.path.join(PROFILE_DIR, "bench.html")
+        sampled = len(df) > PROFILE_SAMPLE_ROWS
+        # Même échantillon que submit_profile, tiré avant l'envoi au processus
+        lignes = df.sample(n=PROFILE_SAMPLE_ROWS, random_state=0) if sampled else df
+        temps["profiling"] = chrono(lambda: render_profile(lignes, "Bench", sampled, chemin), 1)
+        octets["rapport_profiling"] = os.path.getsize(chemin)
+
+    return {
+        "lignes_par_mois": len(df),
+        "mois": len(paths),
+        "lignes_periode": len(plage),
+        "plotly": px is not None,
+        "temps": temps,
+        "octets": octets,
+    }
+
+
+# =================== COMPARAISON À LA RÉFÉRENCE ===================
+def compare(resultats, reference, tolerance):
+    lignes = []
+    for taille, mesures in resultats["tailles"].items():
+        ref_taille = reference.get("tailles", {}).get(taille)
+        if ref_taille is None:
+            continue
+        for etape, m in mesures["temps"].items():
+            ref = ref_taille["temps"].get(etape)
+            if ref is None:
+                continue
+            ratio = m["median"] / ref["median"] if ref["median"] else float("inf")
+            regression = ratio > 1 + tolerance and m["median"] - ref["median"] > NOISE_FLOOR
+            lignes.append({"taille": taille, "mesure": etape, "unite": "s", "reference": ref["median"],
+                           "actuel": m["median"], "ratio": round(ratio, 3), "regression": regression})
+        for nom, n in mesures["octets"].items():
+            ref = ref_taille["octets"].get(nom)
+            if ref is None:
+                continue
+            ratio = n / ref if ref else float("inf")
+            lignes.append({"taille": taille, "mesure": nom, "unite": "octets", "reference": ref,
+                           "actuel": n, "ratio": round(ratio, 3), "regression": ratio > 1 + tolerance})
+    return lignes
+
+
+def _affiche(resultats):
+    for taille, m in resultats["tailles"].items():
+        print(f"\n== {taille} lignes/mois × {m['mois']} mois ==")
+        for etape, t in m["temps"].items():
+            print(f"  {etape:<24} {t['median'] * 1000:10.2f} ms  (min {t['min'] * 1000:.2f} ms)")
+        for nom, n in m["octets"].items():
+            print(f"  {nom:<24} {n:10d} octets")
+
+
+# =========================== CLI ===========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banc d'essai des chemins chauds de kiks_data.")
+    parser.add_argument("--tailles", default="1000,10000,50000", help="lignes par mois, séparées par des virgules")
+    parser.add_argument("--mois", type=int, default=3, help="fichiers mensuels par jeu de données")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--sans-profiling", action="store_true")
+    parser.add_argument("--regenerer", action="store_true", help="régénérer les jeux de données")
+    parser.add_argument("--sortie", default="bench_results.json", help="résultats JSON")
+    parser.add_argument("--baseline", default="bench_baseline.json", help="référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="écart relatif toléré (0.25 = +25 %%)")
+    parser.add_argument("--enregistrer-baseline", action="store_true", help="écrire les résultats comme référence")
+    parser.add_argument("--mesure", help=argparse.SUPPRESS)  # processus enfant
+    args = parser.parse_args(argv)
+
+    if args.mesure:
+        json.dump(mesure(args), sys.stdout)
+        return 0
+
+    resultats = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"python": platform.python_version(), "plateforme": platform.platform(),
+                    "cpu": os.cpu_count()},
+        "parametres": {"mois": args.mois, "repetitions": args.repetitions, "graine": args.graine},
+        "tailles": {},
+    }
+    for taille in [int(t) for t in args.tailles.split(",")]:
+        print(f"… {taille} lignes/mois", flush=True)
+        data_dir, cache_dir = prepare_dataset(taille, args.mois, args.graine, args.regenerer)
+        # Processus neuf : caches mémoire vides et configuration propre au jeu
+        env = dict(os.environ, KIKS_DATA_DIR=data_dir, KIKS_CACHE_DIR=cache_dir)
+        cmd = [sys.executable, os.path.abspath(__file__), "--mesure", data_dir,
+               "--repetitions", str(args.repetitions)] + (["--sans-profiling"] if args.sans_profiling else [])
+        sortie = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout
+        resultats["tailles"][str(taille)] = json.loads(sortie)
+
+    _affiche(resultats)
+    code = 0
+    if os.path.exists(args.baseline) and not args.enregistrer_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            resultats["comparaison"] = compare(resultats, json.load(f), args.tolerance)
+        regressions = [c for c in resultats["comparaison"] if c["regression"]]
+        print(f"\nComparaison à {args.baseline} : {len(regressions)} régression(s)")
+        for c in regressions:
+            print(f"  ✗ {c['taille']:>8} {c['mesure']:<24} {c['reference']} → {c['actuel']} {c['unite']} (×{c['ratio']})")
+        code = 1 if regressions else 0
+
+    chemin = args.baseline if args.enregistrer_baseline else args.sortie
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, ensure_ascii=False, indent=2)
+    print(f"\nRésultats écrits dans {chemin}")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,62 +1,226 @@
+import argparse
 import os
-import pandas as pd
-from datetime import datetime, timedelta
-import random
-import zipfile
 import shutil
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from kiks_data.ingest import sidecar_path, to_typed, write_sidecar
+from kiks_data.schema import schema_for_path
+
+# Générateur de données synthétiques au format de data/ :
+#   <sortie>/<catégorie>/<année>/[Douane_]AAAA_MM.xlsx
+# Avec --format parquet, le miroir Parquet typé de kiks_data est écrit en plus
+# dans --parquet-dir, par défaut <sortie>.kiks_cache/parquet : un cache propre
+# à ces données, distinct de celui de l'application (mêmes chemins relatifs).
+# L'application et le bench le lisent sans conversion avec KIKS_CACHE_DIR.
+# Tirages vectorisés avec numpy et graine dérivée de (graine, catégorie, année,
+# mois) : un même fichier est identique quel que soit l'ordre d'écriture.
+#
+#   python genere.py --sortie data_test --lignes 100000 --format parquet --workers 4
+#   KIKS_DATA_DIR=data_test KIKS_CACHE_DIR=data_test.kiks_cache streamlit run app.py
+
+# Limite d'une feuille Excel, ligne d'en-tête comprise
+XLSX_MAX_ROWS = 1_048_575
+
+ZONES = ["Nord", "Sud", "Est", "Ouest"]
+PROVINCES = ["Fès", "Kénitra", "Oujda", "Tanger", "Casablanca", "Agadir"]
+BUREAUX = ["Aéroport", "Port", "Poste Frontière"]
+FLUX = ["Entrée", "Sortie"]
+
+# ===================== SECTEURS GÉNÉRÉS =====================
+SECTEURS = {
+    "Agroalimentaire": {
+        "categorie": "Agroalimentaire",
+        "designations": [
+            "Céréales", "Fruits", "Légumes", "Viande", "Poisson", "Sucre", "Café",
+            "Thé", "Épices", "Huiles alimentaires", "Produits laitiers", "Produits transformés",
+        ],
+        "operateurs": ["AgroPlus", "BioMaghreb", "ExportAgro", "FoodMaroc", "ImportAli", "Naturex"],
+        "tonnage": (100, 1000),
+    },
+    "Bois et produits forestiers": {
+        "categorie": "Bois et Produits Forestiers",
+        "designations": [
+            "Bois brut", "Bois scié", "Charbon de bois", "Contreplaqué", "Liège", "Meubles en bois",
+            "Palettes", "Panneaux MDF", "Papier recyclé", "Placages", "Produits en rotin", "Pâte à papier",
+        ],
+        "operateurs": ["BoisExport", "EcoBois", "ForestPlus", "ForêtMaroc", "GreenWood", "PapierNord"],
+        "tonnage": (50, 800),
+    },
+    "Pétrole et dérivés": {
+        "categorie": "Pétrole et Dérivés",
+        "designations": [
+            "Pétrole brut", "Essence", "Gazole", "Kérosène", "Mazout", "Bitume", "Lubrifiants",
+            "Gaz de pétrole liquéfié (GPL)", "Huile moteur", "Additifs pétroliers", "Fioul lourd",
+            "Coke de pétrole",
+        ],
+        "operateurs": ["PetroMaroc", "AfricOil", "EnergyPlus", "MarocFuel", "PetroLog", "HydroCarb"],
+        "tonnage": (100, 5000),
+    },
+    # Fichiers douaniers : CATEGORIE Import/Export liée au FLUX, jours sur tout le mois
+    "douane": {
+        "prefixe": "Douane_",
+        "categorie": ["Import", "Export"],
+        "designations": ["Céréales", "Engrais", "Produits chimiques", "Textile", "Voitures", "Électroménager"],
+        "operateurs": ["AtlasTrade", "DouanesPlus", "GlobImport", "MaghrebExport", "TransMaghreb"],
+        "zones": ["Nord", "Sud", "Est", "Ouest", "Centre"],
+        "provinces": ["Fès", "Kénitra", "Oujda", "Tanger", "Agadir"],
+        "tonnage": (5, 500),
+        "mois_complet": True,
+    },
+}
+
+
+# ===================== GÉNÉRATION D'UN MOIS =====================
+def _choix(rng, valeurs, n):
+    # Tirage d'indices puis codes catégoriels : aucune chaîne créée par ligne
+    return pd.Categorical.from_codes(rng.integers(0, len(valeurs), n), categories=valeurs)
+
+
+def genere_mois(secteur, annee, mois, n, graine=0):
+    spec = SECTEURS[secteur]
+    cle = [graine, list(SECTEURS).index(secteur), annee, mois]
+    rng = np.random.default_rng(np.random.SeedSequence(cle))
+
+    debut = np.datetime64(f"{annee}-{mois:02d}-01")
+    nb_jours = pd.Period(f"{annee}-{mois:02d}").days_in_month if spec.get("mois_complet") else 28
+    flux = rng.integers(0, len(FLUX), n)
+    lo, hi = spec["tonnage"]
+
+    if isinstance(spec["categorie"], list):
+        # Entrée <-> Import, Sortie <-> Export
+        categorie = pd.Categorical.from_codes(flux, categories=spec["categorie"])
+    else:
+        categorie = pd.Categorical.from_codes(np.zeros(n, dtype="int8"), categories=[spec["categorie"]])
+
+    return pd.DataFrame({
+        "N°": np.arange(1, n + 1),
+        "ZONE": _choix(rng, spec.get("zones", ZONES), n),
+        "PROVINCE": _choix(rng, spec.get("provinces", PROVINCES), n),
+        "BUREAU": _choix(rng, BUREAUX, n),
+        "OPERATEUR": _choix(rng, spec["operateurs"], n),
+        "DESIGNATION": _choix(rng, spec["designations"], n),
+        "CATEGORIE": categorie,
+        "FLUX": pd.Categorical.from_codes(flux, categories=FLUX),
+        "TONNAGE": np.round(rng.uniform(lo, hi, n), 2),
+        "DATE": debut + rng.integers(0, nb_jours, n).astype("timedelta64[D]"),
+    })
+
+
+# ========================= ÉCRITURE =========================
+def _ecrit_xlsx(df, chemin):
+    # Classeur en écriture seule (flux) : beaucoup plus rapide et sobre que
+    # DataFrame.to_excel pour des centaines de milliers de lignes
+    df = df.assign(DATE=np.datetime_as_string(df["DATE"].to_numpy(), unit="D"))
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(df.columns))
+    colonnes = [df[c].astype(object).to_numpy() if isinstance(df[c].dtype, pd.CategoricalDtype)
+                else df[c].to_numpy().tolist() for c in df.columns]
+    for ligne in zip(*colonnes):
+        ws.append(ligne)
+    wb.save(chemin)
+
+
+def _ecrit_miroir(df, chemin, sortie, parquet_dir):
+    # Miroir au format de kiks_data (types du schéma, mtime et taille du .xlsx,
+    # kiks.format) : identique à celui que l'ingestion écrirait en relisant l'Excel
+    # Même entrée que la relecture du classeur : texte brut, dates en chaînes
+    lu = df.assign(**{c: df[c].astype(object) for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+    lu["DATE"] = np.datetime_as_string(df["DATE"].to_numpy(), unit="D")
+    write_sidecar(chemin, to_typed(lu, schema_for_path(chemin, sortie)), sidecar_path(chemin, sortie, parquet_dir))
+
+
+def dossier_miroirs(sortie):
+    # <sortie>.kiks_cache/parquet : à côté de la sortie, pas dedans (le
+    # catalogue et --zip y verraient une catégorie de plus)
+    return os.path.join(f"{os.path.normpath(sortie)}.kiks_cache", "parquet")
+
+
+def ecrit_mois(sortie, secteur, annee, mois, n, fmt, graine, parquet_dir=None):
+    # Exécuté dans un processus du pool : ne renvoie que des types simples
+    t0 = time.perf_counter()
+    df = genere_mois(secteur, annee, mois, n, graine)
+    dossier = os.path.join(sortie, secteur, str(annee))
+    os.makedirs(dossier, exist_ok=True)
+    nom = f"{SECTEURS[secteur].get('prefixe', '')}{annee}_{mois:02d}.xlsx"
+    chemin = os.path.join(dossier, nom)
+    # Écriture atomique, comme les miroirs Parquet de kiks_data
+    tmp = f"{chemin}.{os.getpid()}.tmp"
+    _ecrit_xlsx(df, tmp)
+    os.replace(tmp, chemin)
+    if fmt == "parquet":
+        _ecrit_miroir(df, chemin, sortie, parquet_dir or dossier_miroirs(sortie))
+    return chemin, n, round(time.perf_counter() - t0, 3)
+
+
+def genere(sortie, secteurs, annees, lignes, fmt="xlsx", workers=None, graine=0, parquet_dir=None):
+    taches = [(secteur, annee, mois) for secteur in secteurs for annee in annees for mois in range(1, 13)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(ecrit_mois, sortie, s, a, m, lignes, fmt, graine, parquet_dir)
+                   for s, a, m in taches]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def zippe(sortie, chemin_zip):
+    with zipfile.ZipFile(chemin_zip, "w", zipfile.ZIP_DEFLATED) as zipf:
+        for root, _, files in os.walk(sortie):
+            for file in files:
+                full_path = os.path.join(root, file)
+                zipf.write(full_path, arcname=os.path.relpath(full_path, sortie))
+
+
+# =========================== CLI ===========================
+def _annees(texte):
+    # "2020-2024" ou "2021"
+    debut, _, fin = texte.partition("-")
+    return range(int(debut), int(fin or debut) + 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère des fichiers mensuels synthétiques au format de data/.")
+    parser.add_argument("--sortie", default="Donnees_Synthetiques", help="dossier de sortie")
+    parser.add_argument("--secteur", action="append", choices=list(SECTEURS),
+                        help="secteur à générer (répétable, tous par défaut)")
+    parser.add_argument("--annees", type=_annees, default=_annees("2020-2024"), help="ex: 2020-2024")
+    parser.add_argument("--lignes", type=int, default=10, help="lignes par fichier mensuel")
+    parser.add_argument("--format", choices=["xlsx", "parquet"], default="xlsx",
+                        help="parquet : .xlsx + miroir Parquet de kiks_data, lisible sans conversion")
+    parser.add_argument("--parquet-dir", default=None,
+                        help="dossier des miroirs Parquet (défaut : <sortie>.kiks_cache/parquet)")
+    parser.add_argument("--workers", type=int, default=None, help="processus d'écriture")
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--nettoyer", action="store_true", help="vider le dossier de sortie avant")
+    parser.add_argument("--zip", metavar="CHEMIN", help="archive ZIP du résultat")
+    args = parser.parse_args(argv)
+
+    if args.lignes > XLSX_MAX_ROWS:
+        parser.error(f"au plus {XLSX_MAX_ROWS} lignes par feuille Excel")
+    if args.nettoyer and os.path.exists(args.sortie):
+        shutil.rmtree(args.sortie)
+
+    t0 = time.perf_counter()
+    total = fichiers = 0
+    for chemin, n, secondes in genere(args.sortie, args.secteur or list(SECTEURS), args.annees,
+                                      args.lignes, args.format, args.workers, args.graine,
+                                      args.parquet_dir):
+        print(f"{secondes:8.3f}s  {chemin}  ({n} lignes)")
+        total += n
+        fichiers += 1
+    print(f"\n✅ {fichiers} fichiers, {total} lignes en {time.perf_counter() - t0:.2f}s dans {args.sortie}")
+    if args.format == "parquet":
+        print(f"✅ Miroirs Parquet : {args.parquet_dir or dossier_miroirs(args.sortie)}")
+
+    if args.zip:
+        zippe(args.sortie, args.zip)
+        print(f"✅ Fichier ZIP généré : {args.zip}")
+
 
-# === Paramètres ===
-output_dir = "Petrole_Derives"
-zip_output_path = "Petrole_Derives_2020_2024.zip"
-years = range(2020, 2025)
-months = range(1, 13)
-
-# === Produits du secteur pétrole ===
-petrole_products = [
-    "Pétrole brut", "Essence", "Gazole", "Kérosène", "Mazout",
-    "Bitume", "Lubrifiants", "Gaz de pétrole liquéfié (GPL)",
-    "Huile moteur", "Additifs pétroliers", "Fioul lourd", "Coke de pétrole"
-]
-zones = ["Nord", "Sud", "Est", "Ouest"]
-provinces = ["Fès", "Kénitra", "Oujda", "Tanger", "Casablanca", "Agadir"]
-bureaux = ["Aéroport", "Port", "Poste Frontière"]
-operateurs = ["PetroMaroc", "AfricOil", "EnergyPlus", "MarocFuel", "PetroLog", "HydroCarb"]
-
-# === Nettoyer dossier précédent ===
-if os.path.exists(output_dir):
-    shutil.rmtree(output_dir)
-
-# === Génération des fichiers ===
-for year in years:
-    year_dir = os.path.join(output_dir, str(year))
-    os.makedirs(year_dir, exist_ok=True)
-
-    for month in months:
-        data = []
-        for i in range(10):  # 10 lignes par mois
-            date = datetime(year, month, 1) + timedelta(days=random.randint(0, 27))
-            data.append({
-                "N°": i + 1,
-                "ZONE": random.choice(zones),
-                "PROVINCE": random.choice(provinces),
-                "BUREAU": random.choice(bureaux),
-                "OPERATEUR": random.choice(operateurs),
-                "DESIGNATION": random.choice(petrole_products),
-                "CATEGORIE": "Pétrole et Dérivés",
-                "FLUX": random.choice(["Entrée", "Sortie"]),
-                "TONNAGE": round(random.uniform(100, 5000), 2),
-                "DATE": date.strftime("%Y-%m-%d")
-            })
-        df = pd.DataFrame(data)
-        file_name = f"{year}_{str(month).zfill(2)}.xlsx"
-        df.to_excel(os.path.join(year_dir, file_name), index=False)
-
-# === Création du fichier ZIP ===
-with zipfile.ZipFile(zip_output_path, 'w', zipfile.ZIP_DEFLATED) as zipf: 
-    for root, _, files in os.walk(output_dir):
-        for file in files:
-            full_path = os.path.join(root, file)
-            relative_path = os.path.relpath(full_path, output_dir)
-            zipf.write(full_path, arcname=relative_path)
-
-print(f"✅ Fichier ZIP généré : {zip_output_path}")
+if __name__ == "__main__":
+    main()
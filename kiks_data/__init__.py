@@ -0,0 +1,34 @@
+from .cache import FrameCache, cached_read, file_key, frame_cache
+from .catalog import Catalog, get_catalog
+from .config import DATA_DIR
+from .filters import apply_filters, distinct_values
+from .ingest import convert_file, load_month, read_month, to_typed
+from .pipeline import import_upload, refresh_month
+from .schema import Schema, SchemaError, coerce, register_schema, schema_for, validate
+from .store import list_periods, read_range
+
+__all__ = [
+    "Catalog",
+    "DATA_DIR",
+    "FrameCache",
+    "Schema",
+    "SchemaError",
+    "apply_filters",
+    "cached_read",
+    "coerce",
+    "convert_file",
+    "distinct_values",
+    "file_key",
+    "frame_cache",
+    "get_catalog",
+    "import_upload",
+    "list_periods",
+    "load_month",
+    "read_month",
+    "read_range",
+    "refresh_month",
+    "register_schema",
+    "schema_for",
+    "to_typed",
+    "validate",
+]
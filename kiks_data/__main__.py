@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+from .api import ENDPOINTS, QueryError, call, parse_params
+from .config import DATA_DIR, PARQUET_DIR, WARMUP_MONTHS
+from .pipeline import ingest_all
+from .server import DEFAULT_HOST, DEFAULT_PORT, serve
+from .warmup import warm_up
+
+
+# ======================== INGEST ========================
+def cmd_ingest(args):
+    def print_result(r):
+        detail = r["error"] if r["error"] else f"{r['rows']} lignes"
+        print(f"{r['status']:>6}  {r['seconds']:7.3f}s  {r['path']}  ({detail})", flush=True)
+
+    t0 = time.perf_counter()
+    results = ingest_all(args.data_dir, args.parquet_dir, args.category,
+                         args.workers, args.force, on_result=print_result)
+    elapsed = time.perf_counter() - t0
+
+    counts = {s: sum(r["status"] == s for r in results) for s in ("ok", "fresh", "error")}
+    print(f"\n{len(results)} fichiers en {elapsed:.2f}s : "
+          f"{counts['ok']} convertis, {counts['fresh']} à jour, {counts['error']} en échec")
+    for r in results:
+        if r["status"] == "error":
+            print(f"  ✗ {r['path']} : {r['error']}", file=sys.stderr)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"elapsed": round(elapsed, 3), "files": results}, f, ensure_ascii=False, indent=2)
+    return 1 if counts["error"] else 0
+
+
+# ======================== QUERY =========================
+def cmd_query(args):
+    items = []
+    for item in args.params:
+        key, sep, value = item.partition("=")
+        if not sep:
+            print(f"Paramètre attendu sous la forme clé=valeur : {item}", file=sys.stderr)
+            return 2
+        items.append((key, value))
+    try:
+        result = call(args.endpoint, parse_params(items), args.data_dir)
+    except QueryError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+    if args.endpoint == "export" and args.output:
+        shutil.move(result["path"], args.output)
+        result["path"] = os.path.abspath(args.output)
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=None if args.compact else 2, default=str)
+    print()
+    return 0
+
+
+# ======================== SERVE =========================
+def cmd_serve(args):
+    serve(args.host, args.port, args.data_dir)
+    return 0
+
+
+# ======================== WARMUP ========================
+def cmd_warmup(args):
+    # Avant le lancement de Streamlit : miroirs, cubes, indicateurs et anomalies
+    # sont prêts sur disque, la première session n'a plus qu'à les lire.
+    timings = warm_up(args.data_dir, args.months, modules=())
+    for step, seconds in timings.items():
+        print(f"{seconds:8.3f}s  {step}")
+    return 0
+
+
+# ========================= CLI ==========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m kiks_data")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="Convertir tous les classeurs mensuels de data/ en Parquet typé")
+    p.add_argument("--data-dir", default=DATA_DIR)
+    p.add_argument("--parquet-dir", default=PARQUET_DIR)
+    p.add_argument("--category", action="append", help="Limiter à une catégorie (répétable)")
+    p.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut : nb de cœurs)")
+    p.add_argument("--force", action="store_true", help="Reconvertir même les miroirs à jour")
+    p.add_argument("--report", help="Écrire le rapport détaillé en JSON dans ce fichier")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser(
+        "query", help="Interroger les données sans Streamlit (résultat JSON)",
+        description="Ex : python -m kiks_data query rows category=douane start=2024-01 "
+                    "filtre.CATEGORIE=Import page_size=50",
+    )
+    p.add_argument("endpoint", choices=sorted(ENDPOINTS))
+    p.add_argument("params", nargs="*", metavar="clé=valeur",
+                   help="Paramètres de la requête ; filtre.COLONNE=a,b pour filtrer")
+    p.add_argument("--data-dir", default=DATA_DIR)
+    p.add_argument("--output", help="export : chemin du fichier à écrire")
+    p.add_argument("--compact", action="store_true", help="JSON sur une seule ligne")
+    p.set_defaults(func=cmd_query)
+
+    p = sub.add_parser("serve", help="Servir les mêmes requêtes en HTTP/JSON (GET /<requête>?clé=valeur)")
+    p.add_argument("--host", default=DEFAULT_HOST)
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--data-dir", default=DATA_DIR)
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("warmup", help="Préparer catalogue, mois récents, indicateurs et anomalies avant le démarrage")
+    p.add_argument("--data-dir", default=DATA_DIR)
+    p.add_argument("--months", type=int, default=WARMUP_MONTHS, help="Mois récents par catégorie")
+    p.set_defaults(func=cmd_warmup)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
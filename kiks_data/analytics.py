@@ -0,0 +1,94 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from .cache import LRUDict
+from .catalog import get_catalog
+from .config import DATA_DIR
+from .cube import DIMENSIONS, MEASURE, dimension_counts, range_cube
+from .instrument import stage
+from .store import read_range
+
+# Colonne ajoutée à chaque résultat : comparaison entre catégories
+CATEGORY = "catégorie"
+
+# (requête, version des données) -> résultat
+_query_cache = LRUDict(256)
+
+
+# ===================== VERSION DES DONNÉES =====================
+def data_version(categories, start, end, data_dir=DATA_DIR):
+    # Empreinte des fichiers mensuels de la plage (depuis le catalogue, sans stat)
+    h = hashlib.sha1()
+    for e in sorted(get_catalog(data_dir).entries(), key=lambda e: e["path"]):
+        if e["category"] in categories and e["period"] and start <= e["period"] <= end:
+            h.update(f"{e['path']}|{e['mtime_ns']}|{e['size']};".encode())
+    return h.hexdigest()
+
+
+# ======================== AGRÉGATS ========================
+def _category_totals(category, start, end, by, data_dir):
+    if len(by) == 1 and by[0] in DIMENSIONS:
+        # Une seule dimension : lue dans les cubes mensuels, sans relire les lignes
+        part = dimension_counts(range_cube(category, start, end, data_dir), by[0])
+        return part[[by[0], "nb", "somme"]]
+    df = read_range(category, start, end, columns=list(by) + [MEASURE], data_dir=data_dir)
+    part = df.groupby(list(by), observed=True)[MEASURE].agg(nb="size", somme="sum").reset_index()
+    return part.astype({col: str for col in by})
+
+
+def totals(categories, start, end, by, data_dir=DATA_DIR):
+    # nb (lignes) et somme de MEASURE par catégorie × colonnes de by
+    frames = []
+    for category in categories:
+        part = _category_totals(category, start, end, by, data_dir)
+        part.insert(0, CATEGORY, category)
+        frames.append(part)
+    if not frames:
+        return pd.DataFrame(columns=[CATEGORY, *by, "nb", "somme"])
+    return pd.concat(frames, ignore_index=True).astype({"nb": "int64", "somme": "float64"})
+
+
+def share_of_total(df, value="somme", within=None):
+    # Part de chaque ligne dans le total (global, ou par groupe de within)
+    total = df.groupby(list(within))[value].transform("sum") if within else df[value].sum()
+    return df.assign(part=(df[value] / total).fillna(0.0))
+
+
+def top_n(df, n, value="somme", within=None):
+    # Sélection partielle (argpartition, O(n)) puis tri des seuls n retenus
+    if within:
+        ranked = df.sort_values(list(within) + [value], ascending=[True] * len(within) + [False], kind="stable")
+        return ranked.groupby(list(within), sort=False).head(n).reset_index(drop=True)
+    values = df[value].to_numpy()
+    if len(values) > n:
+        keep = np.argpartition(-values, n - 1)[:n]
+        df = df.iloc[keep]
+    return df.sort_values(value, ascending=False, kind="stable").reset_index(drop=True)
+
+
+# ==================== REQUÊTE MÉMORISÉE ====================
+def query(categories, start, end, by, n=None, within=None, data_dir=DATA_DIR):
+    # Regroupement multi-catégories + part du total + top n, mémorisé par
+    # (requête, version des données) : un import de mois invalide le résultat
+    categories = sorted(categories)
+    by = list(by)
+    within = list(within or [])
+    key = (tuple(categories), start, end, tuple(by), n, tuple(within),
+           data_version(categories, start, end, data_dir))
+    result = _query_cache.get(key)
+    if result is None:
+        with stage("analyse", rows=None) as info:
+            result = share_of_total(totals(categories, start, end, by, data_dir), within=within)
+            if n:
+                result = top_n(result, n, within=within)
+            info["rows"] = len(result)
+        _query_cache.put(key, result)
+    return result.copy()
+
+
+def compare(categories, start, end, dim, data_dir=DATA_DIR):
+    # Tableau croisé dim × catégorie de la somme de MEASURE
+    result = query(categories, start, end, [dim], data_dir=data_dir)
+    return result.pivot_table(index=dim, columns=CATEGORY, values="somme", aggfunc="sum", fill_value=0.0)
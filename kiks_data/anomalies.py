@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .cache import LRUDict
+from .catalog import get_catalog
+from .config import ANOMALY_DIR, DATA_DIR, PARQUET_DIR
+from .indicators import update_indicators
+from .ingest import SIDECAR_FORMAT, convert_file, sidecar_is_fresh, sidecar_path
+from .instrument import stage
+
+MEASURE = "TONNAGE"
+# Groupes comparables pour les valeurs aberrantes ligne à ligne
+GROUP_KEYS = ["OPERATEUR", "DESIGNATION", "BUREAU"]
+ROW_COLUMNS = ["N°", "DATE", "FLUX", *GROUP_KEYS, MEASURE]
+# En dessous, un groupe est trop petit pour estimer médiane et dispersion
+MIN_GROUP_ROWS = 8
+Z_THRESHOLD = 3.5
+IQR_FACTOR = 1.5
+# Ruptures : mois comparé aux SHIFT_WINDOW mois précédents (au moins SHIFT_MIN_MONTHS)
+SHIFT_WINDOW = 12
+SHIFT_MIN_MONTHS = 6
+
+COLUMNS = [
+    "catégorie", "type", "period", "DESIGNATION", "FLUX", "OPERATEUR", "BUREAU", "N°", "DATE",
+    "mesure", "valeur", "reference", "score", "methode",
+]
+_META_MONTHS = b"kiks.months"
+_META_FORMAT = b"kiks.format"
+
+# (catégorie, empreinte des mois) -> table des anomalies
+_memo = LRUDict(64)
+_lock = threading.Lock()
+
+
+# ================ QUANTILES PAR GROUPE (NUMPY) ================
+def group_quantiles(codes, values, qs):
+    # codes : numéro de groupe 0..G-1 par ligne. Un seul tri (groupe, valeur)
+    # puis interpolation linéaire aux positions q * (n - 1) de chaque groupe.
+    n_groups = int(codes.max()) + 1 if len(codes) else 0
+    order = np.lexsort((values, codes))
+    ordered = values[order]
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    out = np.full((n_groups, len(qs)), np.nan)
+    valid = counts > 0
+    for j, q in enumerate(qs):
+        pos = starts[valid] + q * (counts[valid] - 1)
+        lo = np.floor(pos).astype("int64")
+        hi = np.ceil(pos).astype("int64")
+        frac = pos - lo
+        out[valid, j] = ordered[lo] * (1 - frac) + ordered[hi] * frac
+    return out, counts
+
+
+# ==================== LIGNES ABERRANTES ====================
+def _scan_rows(category, data_dir, parquet_dir):
+    # Colonnes utiles de tous les mois, avec la période de chaque ligne
+    frames = []
+    for e in get_catalog(data_dir).entries(category):
+        if not e["period"]:
+            continue
+        sidecar = sidecar_path(e["path"], data_dir, parquet_dir)
+        if not sidecar_is_fresh(e["path"], sidecar):
+            convert_file(e["path"], data_dir, parquet_dir)
+        columns = [c for c in ROW_COLUMNS if c in pq.read_schema(sidecar).names]
+        if MEASURE not in columns or not set(GROUP_KEYS) <= set(columns):
+            continue
+        df = pq.read_table(sidecar, columns=columns).to_pandas()
+        df["period"] = e["period"]
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=[*ROW_COLUMNS, "period"])
+
+
+def row_outliers(df):
+    # Score z robuste (médiane / MAD) et règle de Tukey (IQR) par
+    # OPERATEUR × DESIGNATION × BUREAU, sur tout l'historique de la catégorie
+    df = df[df[MEASURE].notna()].reset_index(drop=True)
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    codes = df.groupby(GROUP_KEYS, observed=True, sort=False).ngroup().to_numpy()
+    values = df[MEASURE].to_numpy(dtype="float64")
+
+    quartiles, counts = group_quantiles(codes, values, [0.25, 0.5, 0.75])
+    q1, median, q3 = quartiles.T
+    deviation = np.abs(values - median[codes])
+    mad = group_quantiles(codes, deviation, [0.5])[0][:, 0]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(mad[codes] > 0, 0.6745 * (values - median[codes]) / mad[codes], np.nan)
+    iqr = q3 - q1
+    low, high = q1 - IQR_FACTOR * iqr, q3 + IQR_FACTOR * iqr
+    big_enough = counts[codes] >= MIN_GROUP_ROWS
+    by_z = big_enough & (np.abs(np.nan_to_num(z)) > Z_THRESHOLD)
+    by_iqr = big_enough & ((values < low[codes]) | (values > high[codes]))
+    flagged = by_z | by_iqr
+    if not flagged.any():
+        return pd.DataFrame(columns=COLUMNS)
+
+    out = df.loc[flagged].copy()
+    out["type"] = "ligne"
+    out["mesure"] = MEASURE
+    out["valeur"] = values[flagged]
+    out["reference"] = median[codes][flagged]
+    out["score"] = z[flagged]
+    out["methode"] = np.select([by_z[flagged] & by_iqr[flagged], by_z[flagged]], ["z+iqr", "z"], "iqr")
+    return out
+
+
+# ==================== RUPTURES MENSUELLES ====================
+def monthly_shifts(table):
+    # table : indicateurs mensuels (DESIGNATION × FLUX × mesure). Chaque mois
+    # est comparé à la médiane et à l'IQR des SHIFT_WINDOW mois précédents.
+    if table.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    wide = table.pivot_table(index="period", columns=["mesure", "DESIGNATION", "FLUX"], values="valeur")
+    previous = wide.shift(1).rolling(SHIFT_WINDOW, min_periods=SHIFT_MIN_MONTHS)
+    median = previous.median()
+    spread = (previous.quantile(0.75) - previous.quantile(0.25)) / 1.349
+    score = (wide - median) / spread.where(spread > 0)
+
+    long = pd.concat(
+        {"valeur": wide.stack(["mesure", "DESIGNATION", "FLUX"], future_stack=True),
+         "reference": median.stack(["mesure", "DESIGNATION", "FLUX"], future_stack=True),
+         "score": score.stack(["mesure", "DESIGNATION", "FLUX"], future_stack=True)},
+        axis=1,
+    ).reset_index()
+    out = long[long["score"].abs() > Z_THRESHOLD].copy()
+    out["type"] = "rupture"
+    out["methode"] = np.where(out["score"] > 0, "hausse", "baisse")
+    return out
+
+
+# ======================== STOCKAGE ========================
+def _store_path(category, anomaly_dir=ANOMALY_DIR):
+    return os.path.join(anomaly_dir, f"{category}.parquet")
+
+
+def _month_versions(category, data_dir):
+    return {
+        e["period"]: f"{e['path']}|{e['mtime_ns']}|{e['size']}"
+        for e in get_catalog(data_dir).entries(category) if e["period"]
+    }
+
+
+def _read_store(path, months):
+    # Table stockée si elle a été calculée sur exactement ces versions de fichiers
+    try:
+        table = pq.read_table(path)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    meta = table.schema.metadata or {}
+    if (meta.get(_META_FORMAT) != SIDECAR_FORMAT.encode()
+            or json.loads(meta.get(_META_MONTHS, b"{}")) != months):
+        return None
+    return table.to_pandas()
+
+
+def _write_store(path, df, months):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[_META_MONTHS] = json.dumps(months, sort_keys=True).encode()
+    meta[_META_FORMAT] = SIDECAR_FORMAT.encode()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table.replace_schema_metadata(meta), tmp)
+    os.replace(tmp, path)
+
+
+def _normalize(df, category):
+    df = df.reindex(columns=COLUMNS)
+    df["catégorie"] = category
+    text = ["catégorie", "type", "period", "DESIGNATION", "FLUX", "OPERATEUR", "BUREAU", "mesure", "methode"]
+    df[text] = df[text].astype("string")
+    df["N°"] = pd.to_numeric(df["N°"]).astype("Int64")
+    df["DATE"] = pd.to_datetime(df["DATE"])
+    return df.astype({"valeur": "float64", "reference": "float64", "score": "float64"})
+
+
+def detect(category, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR, anomaly_dir=ANOMALY_DIR):
+    # Table des anomalies d'une catégorie, recalculée seulement quand un
+    # fichier mensuel a changé (version des mois dans les métadonnées)
+    months = _month_versions(category, data_dir)
+    if not months:
+        # Aucun fichier nommé AAAA_MM : pas de période, donc rien à comparer
+        return _normalize(pd.DataFrame(), category)
+    digest = hashlib.sha1(json.dumps(months, sort_keys=True).encode()).hexdigest()
+    key = (os.path.abspath(data_dir), category, digest)
+    table = _memo.get(key)
+    if table is not None:
+        return table
+
+    with _lock, stage("anomalies", rows=None) as info:
+        path = _store_path(category, anomaly_dir)
+        table = _read_store(path, months)
+        if table is None:
+            rows = row_outliers(_scan_rows(category, data_dir, parquet_dir))
+            shifts = monthly_shifts(update_indicators(category, data_dir, parquet_dir)[0])
+            parts = [_normalize(p, category) for p in (rows, shifts) if not p.empty]
+            table = pd.concat(parts, ignore_index=True) if parts else _normalize(pd.DataFrame(), category)
+            table = table.sort_values(["period", "type"], ignore_index=True)
+            _write_store(path, table, months)
+            info["rows"] = len(table)
+        _memo.put(key, table)
+        return table
+
+
+def anomalies(categories=None, start=None, end=None, kind=None, data_dir=DATA_DIR):
+    # Anomalies déjà détectées, toutes catégories et années confondues
+    catalog = get_catalog(data_dir)
+    frames = [detect(c, data_dir) for c in (categories or catalog.categories())]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return _normalize(pd.DataFrame(), None)
+    df = pd.concat(frames, ignore_index=True)
+    if start:
+        df = df[df["period"] >= start]
+    if end:
+        df = df[df["period"] <= end]
+    if kind:
+        df = df[df["type"] == kind]
+    return df.reset_index(drop=True)
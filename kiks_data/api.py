@@ -0,0 +1,202 @@
+# Requêtes sans Streamlit sur la même couche de données que les pages :
+# catalogue, miroirs Parquet, cubes et caches partagés. Utilisé par la CLI
+# (python -m kiks_data query ...) et par le serveur HTTP/JSON (server.py).
+import inspect
+import json
+
+from .analytics import CATEGORY, query
+from .anomalies import anomalies
+from .catalog import get_catalog
+from .config import DATA_DIR
+from .cube import DIMENSIONS, daily_series, dimension_counts, range_cube
+from .export import FORMATS, export
+from .filters import filterable_columns
+from .indicators import indicators
+from .store import list_periods, range_batches, read_range
+from .table import page, page_count
+
+# Au-delà, utiliser l'export (fichier écrit par blocs)
+MAX_PAGE_SIZE = 10_000
+
+# Conversion des paramètres texte (URL ou ligne de commande)
+LIST_PARAMS = {"categories", "columns", "by", "within", "dims"}
+INT_PARAMS = {"page_number", "page_size", "n"}
+BOOL_PARAMS = {"descending"}
+FILTER_PREFIX = "filtre."
+
+
+class QueryError(ValueError):
+    """Paramètres de requête invalides (HTTP 400, code de sortie 2)."""
+
+
+def records(df):
+    # NaN -> null, dates ISO, catégories en texte
+    return json.loads(df.to_json(orient="records", date_format="iso", force_ascii=False))
+
+
+# ======================== REQUÊTES ========================
+def _bounds(category, start, end, data_dir):
+    periods = list_periods(category, data_dir)
+    if not periods:
+        raise QueryError(f"Catégorie inconnue ou sans fichier mensuel : {category}")
+    return start or periods[0], end or periods[-1]
+
+
+def _check_columns(category, end, names, what, data_dir):
+    # Colonnes des miroirs Parquet (dernier mois de la plage, lu via le cache) :
+    # un nom inconnu donne une erreur 400 plutôt qu'une erreur Arrow
+    known = set(read_range(category, end, end, data_dir=data_dir).columns)
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise QueryError(f"{what} inconnue(s) pour {category} : {', '.join(unknown)}")
+
+
+def _check_filters(category, end, filters, data_dir):
+    # Les valeurs filtre.COL arrivent en texte : seules les colonnes texte
+    # (filterable_columns) sont filtrables, les autres donnent une erreur 400
+    if not filters:
+        return
+    _check_columns(category, end, list(filters), "Colonne(s) de filtre", data_dir)
+    allowed = filterable_columns(read_range(category, end, end, data_dir=data_dir))
+    refused = [col for col in filters if col not in allowed]
+    if refused:
+        raise QueryError(f"Filtre possible sur les colonnes texte seulement : {', '.join(refused)} "
+                         f"(filtrables : {', '.join(allowed)})")
+
+
+def categories(data_dir=DATA_DIR):
+    catalog = get_catalog(data_dir)
+    return [
+        {"category": c, "years": catalog.years(c), "periods": list_periods(c, data_dir)}
+        for c in catalog.categories()
+    ]
+
+
+def periods(category, data_dir=DATA_DIR):
+    # Mois disponibles avec leur nombre de lignes (catalogue, sans ouvrir les fichiers)
+    return [
+        {"period": e["period"], "year": e["year"], "file": e["month"], "rows": e["rows"]}
+        for e in sorted(get_catalog(data_dir).entries(category), key=lambda e: e["path"]) if e["period"]
+    ]
+
+
+def rows(category, start=None, end=None, columns=None, filters=None, sort=None, descending=False,
+         page_number=1, page_size=100, data_dir=DATA_DIR):
+    # Lignes d'une plage de mois, filtrées à la lecture Parquet, une page à la fois
+    start, end = _bounds(category, start, end, data_dir)
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise QueryError(f"page_size doit être compris entre 1 et {MAX_PAGE_SIZE}")
+    _check_columns(category, end, columns or [], "Colonne(s)", data_dir)
+    _check_filters(category, end, filters, data_dir)
+    df = read_range(category, start, end, columns=columns, filters=filters, data_dir=data_dir)
+    if sort is not None and sort not in df.columns:
+        raise QueryError(f"Colonne de tri inconnue : {sort}")
+    n_pages = page_count(len(df), page_size)
+    page_number = min(max(page_number, 1), n_pages)
+    window = page(df, page_number, page_size, sort_by=sort, ascending=not descending)
+    return {"category": category, "start": start, "end": end, "total": len(df),
+            "page_number": page_number, "pages": n_pages, "rows": records(window)}
+
+
+def dashboard(category, start=None, end=None, dims=None, data_dir=DATA_DIR):
+    # Contenu du tableau de bord (répartitions et série journalière) lu dans les cubes
+    start, end = _bounds(category, start, end, data_dir)
+    unknown = [dim for dim in dims or [] if dim not in DIMENSIONS]
+    if unknown:
+        raise QueryError(f"Dimension(s) inconnue(s) : {', '.join(unknown)} (disponibles : {', '.join(DIMENSIONS)})")
+    cube = range_cube(category, start, end, data_dir)
+    return {
+        "category": category, "start": start, "end": end,
+        "counts": {dim: records(dimension_counts(cube, dim)) for dim in (dims or DIMENSIONS)},
+        "series": records(daily_series(cube)),
+    }
+
+
+def totals(categories, start, end, by, n=None, within=None, data_dir=DATA_DIR):
+    if n is not None and n < 1:
+        raise QueryError(f"n doit être un entier positif : {n}")
+    if not by:
+        raise QueryError("by : au moins une colonne de regroupement")
+    for category in categories:
+        _bounds(category, start, end, data_dir)
+        _check_columns(category, end, by, "Colonne(s) de regroupement", data_dir)
+    extra = [col for col in within or [] if col not in by and col != CATEGORY]
+    if extra:
+        raise QueryError(f"within doit reprendre des colonnes de by ou {CATEGORY} : {', '.join(extra)}")
+    return records(query(categories, start, end, by, n=n, within=within, data_dir=data_dir))
+
+
+def monthly_indicators(category, start=None, end=None, data_dir=DATA_DIR):
+    table = indicators(category, data_dir)
+    if start:
+        table = table[table["period"] >= start]
+    if end:
+        table = table[table["period"] <= end]
+    return records(table)
+
+
+def anomaly_list(categories=None, start=None, end=None, kind=None, data_dir=DATA_DIR):
+    return records(anomalies(categories, start, end, kind, data_dir))
+
+
+def export_rows(category, format="csv", start=None, end=None, columns=None, filters=None, data_dir=DATA_DIR):
+    # Fichier écrit par lots depuis les miroirs Parquet ; renvoie son chemin
+    if format not in FORMATS:
+        raise QueryError(f"Format inconnu : {format} (attendu : {', '.join(FORMATS)})")
+    start, end = _bounds(category, start, end, data_dir)
+    _check_columns(category, end, columns or [], "Colonne(s)", data_dir)
+    _check_filters(category, end, filters, data_dir)
+    batches = range_batches(category, start, end, columns=columns, filters=filters, data_dir=data_dir)
+    path, n = export(batches, format, name=f"{category}_{start}_{end}")
+    return {"path": path, "rows": n, "format": format, "file_name": f"{category}_{start}_{end}.{FORMATS[format][1]}"}
+
+
+ENDPOINTS = {
+    "categories": categories,
+    "periods": periods,
+    "rows": rows,
+    "dashboard": dashboard,
+    "totals": totals,
+    "indicators": monthly_indicators,
+    "anomalies": anomaly_list,
+    "export": export_rows,
+}
+
+
+# ===================== APPEL GÉNÉRIQUE =====================
+def parse_params(items):
+    # items : [(clé, valeur texte)] ; "filtre.COL=a,b" devient filters={"COL": ["a", "b"]}
+    params, filters = {}, {}
+    for key, value in items:
+        if key.startswith(FILTER_PREFIX):
+            filters.setdefault(key[len(FILTER_PREFIX):], []).extend(v for v in value.split(",") if v)
+        elif key in LIST_PARAMS:
+            params[key] = [v for v in value.split(",") if v]
+        elif key in INT_PARAMS:
+            try:
+                params[key] = int(value)
+            except ValueError:
+                raise QueryError(f"{key} doit être un entier : {value!r}") from None
+        elif key in BOOL_PARAMS:
+            params[key] = value.lower() in ("1", "true", "oui", "yes")
+        else:
+            params[key] = value
+    if filters:
+        params["filters"] = filters
+    return params
+
+
+def call(endpoint, params, data_dir=DATA_DIR):
+    # data_dir est fixé par l'appelant (serveur, CLI), jamais par la requête
+    func = ENDPOINTS.get(endpoint)
+    if func is None:
+        raise QueryError(f"Requête inconnue : {endpoint} (disponibles : {', '.join(ENDPOINTS)})")
+    accepted = set(inspect.signature(func).parameters) - {"data_dir"}
+    unknown = sorted(set(params) - accepted)
+    if unknown:
+        raise QueryError(f"Paramètre(s) inconnu(s) pour {endpoint} : {', '.join(unknown)}")
+    try:
+        inspect.signature(func).bind(**params)
+    except TypeError as exc:
+        raise QueryError(f"{endpoint} : {exc}") from None
+    return func(**params, data_dir=data_dir)
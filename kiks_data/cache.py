@@ -0,0 +1,165 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from .config import CACHE_MAX_MB
+from .instrument import count, stage
+
+# Attribut df.attrs portant la version du jeu de données (clé de cache)
+VERSION_ATTR = "kiks_version"
+
+
+# ==================== CLÉS DE VERSION ====================
+def file_key(path):
+    # Une version de fichier = (chemin, mtime, taille) : toute réécriture
+    # (ex: import admin) produit une nouvelle clé et invalide l'ancienne entrée.
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def content_hash(df):
+    # Empreinte du contenu (colonnes + valeurs), indépendante du fichier d'origine
+    h = hashlib.sha1()
+    h.update(repr(list(df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+# =================== CACHE LRU BORNÉ =====================
+class FrameCache:
+    """Cache LRU de DataFrames, borné en octets et partagé entre les sessions."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # clé -> (df, nbytes)
+        # key[0] = source de l'entrée (chemin absolu ou nom logique) -> clés
+        self._by_path = {}
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                count("cache.miss")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            count("cache.hit")
+            return entry[0]
+
+    def put(self, key, df):
+        df.attrs[VERSION_ATTR] = key
+        nbytes = frame_nbytes(df)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (df, nbytes)
+            self._by_path.setdefault(key[0], set()).add(key)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, path):
+        with self._lock:
+            for key in list(self._by_path.get(os.path.abspath(path), ())):
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_path.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def report(self):
+        # Un jeu de données par entrée, du plus récemment utilisé au plus ancien
+        with self._lock:
+            items = list(reversed(self._entries.items()))
+        return [
+            {"source": key[0], "cle": key, "lignes": len(df), "colonnes": df.shape[1], "octets": nbytes}
+            for key, (df, nbytes) in items
+        ]
+
+    def peek(self, key):
+        # Lecture sans effet sur l'ordre LRU ni sur les compteurs (rapports)
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else entry[0]
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._nbytes -= entry[1]
+        keys = self._by_path.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_path[key[0]]
+
+
+# ================ PETIT CACHE LRU EN NOMBRE =================
+class LRUDict:
+    """Dictionnaire LRU thread-safe borné en nombre d'entrées (petits objets)."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Instance unique : le module est importé une seule fois par processus
+# Streamlit, le cache survit donc aux reruns et est partagé entre sessions.
+frame_cache = FrameCache(CACHE_MAX_MB * 1024 * 1024)
+
+
+def cached_read(path, reader):
+    key = file_key(path)
+    df = frame_cache.get(key)
+    if df is None:
+        # Une ancienne version du même fichier ne sert plus à rien
+        frame_cache.invalidate(path)
+        df = reader(path)
+        frame_cache.put(key, df)
+    # Copie : les pages modifient parfois le DataFrame (ex: conversion de dates)
+    with stage("copie", rows=len(df)):
+        return df.copy()
@@ -0,0 +1,211 @@
+import hashlib
+import os
+import re
+import threading
+import time
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .config import CATALOG_TTL, DATA_DIR, PARQUET_DIR
+from .ingest import sidecar_is_fresh, sidecar_path
+
+# Les fichiers mensuels se terminent par AAAA_MM.xlsx (ex: Douane_2020_01.xlsx)
+_MONTH_RE = re.compile(r"(\d{4})_(\d{2})\.xlsx$")
+# Ancienne convention : MM.xlsx, l'année est celle du dossier (ex: 2023/05.xlsx)
+_LEGACY_RE = re.compile(r"(0[1-9]|1[0-2])\.xlsx")
+
+
+def period_of(month_file, year=None):
+    # "Douane_2020_01.xlsx" -> "2020-01" ; "05.xlsx" du dossier 2023 -> "2023-05" ;
+    # None si le nom ne suit aucune des deux conventions
+    m = _MONTH_RE.search(month_file)
+    if m:
+        return f"{m.group(1)}-{m.group(2)}"
+    m = _LEGACY_RE.fullmatch(month_file)
+    if m and year is not None and re.fullmatch(r"\d{4}", str(year)):
+        return f"{year}-{m.group(1)}"
+    return None
+
+
+def _schema_hash(schema):
+    h = hashlib.sha1()
+    for field in schema:
+        h.update(f"{field.name}:{field.type};".encode())
+    return h.hexdigest()[:12]
+
+
+# ========================= CATALOGUE =========================
+class Catalog:
+    """Index en mémoire de data/<catégorie>/<année>/<mois>.xlsx.
+
+    Chaque entrée : category, year, month, period, path, size, mtime_ns,
+    rows et schema (lus dans le miroir Parquet s'il est à jour, sinon None).
+    Les dossiers catégorie/année sont aussi retenus, même vides : la
+    navigation et l'import peuvent viser une année sans fichier mensuel.
+    Le catalogue est relu quand il est marqué périmé (import, watchdog) ou,
+    sans surveillance du disque, au plus toutes les CATALOG_TTL secondes.
+    Une relecture ne rouvre que les fichiers dont la taille ou le mtime a changé.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR, ttl=CATALOG_TTL):
+        self.data_dir = data_dir
+        self.parquet_dir = parquet_dir
+        self.ttl = ttl
+        self.watching = False
+        self._entries = {}  # chemin -> entrée
+        self._dirs = {}  # catégorie -> années (dossiers)
+        self._scanned_at = None
+        self._dirty = True
+        self._lock = threading.Lock()
+
+    # ---------------------- rafraîchissement ----------------------
+    def _describe(self, path):
+        entry = {"rows": None, "schema": None}
+        sidecar = sidecar_path(path, self.data_dir, self.parquet_dir)
+        if sidecar_is_fresh(path, sidecar):
+            meta = pq.read_metadata(sidecar)
+            entry["rows"] = meta.num_rows
+            entry["schema"] = _schema_hash(meta.schema.to_arrow_schema())
+        return entry
+
+    def _entry(self, category, year, name, path, st):
+        old = self._entries.get(path)
+        if (old is not None and old["mtime_ns"] == st.st_mtime_ns
+                and old["size"] == st.st_size and old["rows"] is not None):
+            return old
+        entry = {
+            "category": category,
+            "year": year,
+            "month": name,
+            "period": period_of(name, year),
+            "path": path,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+        entry.update(self._describe(path))
+        return entry
+
+    def _scan(self):
+        entries, dirs = {}, {}
+        if not os.path.isdir(self.data_dir):
+            return entries, dirs
+        for cat in os.scandir(self.data_dir):
+            if not cat.is_dir():
+                continue
+            years = dirs[cat.name] = set()
+            for year in os.scandir(cat.path):
+                if not year.is_dir():
+                    continue
+                years.add(year.name)
+                for f in os.scandir(year.path):
+                    if f.name.endswith(".xlsx") and f.is_file():
+                        path = os.path.join(self.data_dir, cat.name, year.name, f.name)
+                        entries[path] = self._entry(cat.name, year.name, f.name, path, f.stat())
+        return entries, dirs
+
+    def refresh(self, force=False):
+        with self._lock:
+            # Avec watchdog, on ne relit par TTL que pour compléter les
+            # entrées dont le miroir Parquet n'existait pas encore.
+            stale = not self.watching or any(e["rows"] is None for e in self._entries.values())
+            expired = stale and (
+                self._scanned_at is None or time.monotonic() - self._scanned_at > self.ttl
+            )
+            if force or self._dirty or expired:
+                self._entries, self._dirs = self._scan()
+                self._scanned_at = time.monotonic()
+                self._dirty = False
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def update_file(self, path):
+        # Mise à jour ciblée après un import : pas de relecture de l'arborescence
+        rel = os.path.relpath(path, self.data_dir).split(os.sep)
+        if len(rel) != 3:
+            self.mark_dirty()
+            return
+        path = os.path.join(self.data_dir, *rel)
+        with self._lock:
+            self._entries.pop(path, None)
+            self._entries[path] = self._entry(rel[0], rel[1], rel[2], path, os.stat(path))
+            self._dirs.setdefault(rel[0], set()).add(rel[1])
+
+    # --------------------------- lectures ---------------------------
+    def entries(self, category=None, year=None):
+        self.refresh()
+        with self._lock:
+            rows = list(self._entries.values())
+        return [
+            e for e in rows
+            if (category is None or e["category"] == category) and (year is None or e["year"] == year)
+        ]
+
+    def categories(self):
+        self.refresh()
+        with self._lock:
+            return sorted(self._dirs)
+
+    def years(self, category):
+        self.refresh()
+        with self._lock:
+            return sorted(self._dirs.get(category, ()))
+
+    def months(self, category, year):
+        return sorted(e["month"] for e in self.entries(category, year))
+
+    def entry(self, category, year, month):
+        for e in self.entries(category, year):
+            if e["month"] == month:
+                return e
+        return None
+
+    def table(self):
+        columns = ["category", "year", "month", "period", "path", "size", "mtime_ns", "rows", "schema"]
+        table = pd.DataFrame(self.entries(), columns=columns).astype({"rows": "Int64"})
+        return table.sort_values("path", ignore_index=True)
+
+
+# ==================== SURVEILLANCE DU DISQUE ====================
+# Événements watchdog qui modifient l'arborescence ou le contenu d'un fichier
+_DIR_EVENTS = ("created", "deleted", "moved")
+_FILE_EVENTS = ("created", "deleted", "moved", "modified", "closed")
+
+def _start_watcher(catalog):
+    # watchdog est optionnel : sans lui, le catalogue se relit par TTL
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class _Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            # Les lectures (opened, closed_no_write) ne changent rien : sans ce
+            # filtre, chaque lecture d'un classeur forcerait une relecture complète.
+            kinds = _DIR_EVENTS if event.is_directory else _FILE_EVENTS
+            if event.event_type in kinds:
+                catalog.mark_dirty()
+
+    observer = Observer()
+    observer.schedule(_Handler(), catalog.data_dir, recursive=True)
+    observer.daemon = True
+    observer.start()
+    catalog.watching = True
+    return observer
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(data_dir=DATA_DIR, watch=True):
+    key = os.path.abspath(data_dir)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = Catalog(data_dir)
+            if watch and os.path.isdir(data_dir):
+                _start_watcher(catalog)
+    return catalog
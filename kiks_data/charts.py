@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+# Nombre maximal de points envoyés à Plotly pour une courbe
+MAX_POINTS = 1000
+
+# Libellés de l'interface -> fréquences pandas
+FREQUENCIES = {"Jour": "D", "Semaine": "W", "Mois": "MS"}
+
+
+# ===================== RÉÉCHANTILLONNAGE =====================
+def resample_series(serie, freq, date_col="DATE"):
+    # Cumule nb/somme (ou toute colonne additive) par jour, semaine ou mois
+    if serie.empty:
+        return serie
+    return (
+        serie.set_index(date_col)
+        .resample(freq)
+        .sum(numeric_only=True)
+        .reset_index()
+    )
+
+
+# ===================== SOUS-ÉCHANTILLONNAGE LTTB =====================
+def lttb(x, y, n_out):
+    # Largest-Triangle-Three-Buckets : indices des n_out points qui
+    # préservent au mieux la forme de la courbe (premier et dernier inclus).
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 seaux entre le premier et le dernier point
+    edges = np.append(np.linspace(1, n - 1, n_out - 1).astype("int64"), n)
+    out = np.empty(n_out, dtype="int64")
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = edges[i + 1], edges[i + 2]
+        cx = x[nxt_lo:nxt_hi].mean()
+        cy = y[nxt_lo:nxt_hi].mean()
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def downsample(df, x, y, max_points=MAX_POINTS):
+    # Borne la taille du DataFrame tracé, quel que soit le nombre de points
+    if len(df) <= max_points:
+        return df
+    xs = df[x]
+    if pd.api.types.is_datetime64_any_dtype(xs):
+        xs = xs.astype("int64")
+    return df.iloc[lttb(xs.to_numpy(), df[y].to_numpy(), max_points)]
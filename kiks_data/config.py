@@ -0,0 +1,50 @@
+import os
+
+# ======================== CHEMINS ========================
+# Racine des fichiers Excel mensuels : data/<catégorie>/<année>/<mois>.xlsx
+DATA_DIR = os.environ.get("KIKS_DATA_DIR", "data")
+
+# ===================== CACHE MÉMOIRE =====================
+# Budget mémoire (en Mo) du cache partagé des DataFrames chargés
+CACHE_MAX_MB = int(os.environ.get("KIKS_CACHE_MAX_MB", "512"))
+
+# =================== DONNÉES DÉRIVÉES ====================
+# Miroirs Parquet, index et agrégats : hors de data/ pour ne pas apparaître
+# comme une catégorie dans la navigation.
+CACHE_DIR = os.environ.get("KIKS_CACHE_DIR", ".kiks_cache")
+PARQUET_DIR = os.path.join(CACHE_DIR, "parquet")
+CUBE_DIR = os.path.join(CACHE_DIR, "cube")
+PROFILE_DIR = os.path.join(CACHE_DIR, "profiles")
+
+# ====================== PROFILING ========================
+# Au-delà de ce nombre de lignes : échantillon + configuration minimale
+PROFILE_SAMPLE_ROWS = int(os.environ.get("KIKS_PROFILE_SAMPLE_ROWS", "10000"))
+UPLOAD_DIR = os.path.join(CACHE_DIR, "uploads")
+
+# ==================== LECTURE EN FLUX ====================
+# Nombre de lignes Excel converties en DataFrame à la fois
+STREAM_CHUNK_ROWS = int(os.environ.get("KIKS_STREAM_CHUNK_ROWS", "50000"))
+
+# ================= TÂCHES EN ARRIÈRE-PLAN =================
+JOBS_DIR = os.path.join(CACHE_DIR, "jobs")
+# Un cœur reste libre pour le serveur Streamlit
+JOB_WORKERS = int(os.environ.get("KIKS_JOB_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+
+# ======================= CATALOGUE =======================
+# Sans watchdog, le catalogue relit l'arborescence au plus toutes les N secondes
+CATALOG_TTL = float(os.environ.get("KIKS_CATALOG_TTL", "10"))
+INDEX_DIR = os.path.join(CACHE_DIR, "index")
+# Séries mensuelles et indicateurs (MoM, YoY, moyennes mobiles) par catégorie
+INDICATOR_DIR = os.path.join(CACHE_DIR, "indicators")
+# Lignes aberrantes et ruptures de séries détectées à l'ingestion
+ANOMALY_DIR = os.path.join(CACHE_DIR, "anomalies")
+# Fichiers d'export (CSV, Parquet, XLSX) écrits par blocs avant téléchargement
+EXPORT_DIR = os.path.join(CACHE_DIR, "exports")
+
+# ==================== INSTRUMENTATION ====================
+# Journal JSON des relances (une ligne par exécution de page) ; vide = désactivé
+PERF_LOG = os.environ.get("KIKS_PERF_LOG", os.path.join(CACHE_DIR, "logs", "perf.jsonl"))
+
+# ======================= DÉMARRAGE =======================
+# Mois les plus récents de chaque catégorie préchargés au démarrage du serveur ; 0 = désactivé
+WARMUP_MONTHS = int(os.environ.get("KIKS_WARMUP_MONTHS", "3"))
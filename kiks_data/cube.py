@@ -0,0 +1,159 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import VERSION_ATTR, LRUDict, file_key
+from .config import CUBE_DIR, DATA_DIR
+from .ingest import load_month, sidecar_is_fresh, sidecar_path, write_sidecar
+from .instrument import stage
+from .store import partitions, prune
+
+# ====================== DÉFINITION DU CUBE ======================
+MEASURE = "TONNAGE"
+DIMENSIONS = ["ZONE", "PROVINCE", "BUREAU", "OPERATEUR", "DESIGNATION", "FLUX"]
+DATE_DIMENSION = "DATE"
+# Largeur fixe des classes d'histogramme : les comptes de plusieurs mois
+# s'additionnent directement et sont regroupés à l'affichage.
+HIST_BIN_WIDTH = 10.0
+
+# Une table Parquet par morceau du cube, à côté des autres miroirs
+CUBE_PARTS = ("groups", "hist", "describe")
+
+# file_key du .xlsx -> cube (petits DataFrames)
+_cube_cache = LRUDict(1024)
+
+
+def compute_cube(df):
+    # groups   : dimension, valeur, nb (lignes), somme (du TONNAGE)
+    # hist     : classe (entier, largeur HIST_BIN_WIDTH), nb
+    # describe : df.describe() des colonnes numériques, stat en colonne
+    # Le DataFrame est déjà typé à l'ingestion (schema.coerce) : aucune conversion ici
+    has_measure = MEASURE in df.columns
+    measure = df[MEASURE] if has_measure else None
+
+    frames = []
+    keys = [(dim, df[dim]) for dim in DIMENSIONS if dim in df.columns]
+    if DATE_DIMENSION in df.columns:
+        dates = df[DATE_DIMENSION].dt.floor("D")
+        keys.append((DATE_DIMENSION, dates))
+    for dim, key in keys:
+        grouped = (measure if has_measure else pd.Series(np.nan, index=df.index)).groupby(key, observed=True)
+        part = grouped.agg(nb="size", somme="sum").reset_index(names="valeur")
+        part.insert(0, "dimension", dim)
+        part["valeur"] = part["valeur"].astype(str)
+        frames.append(part)
+    groups = (
+        pd.concat(frames, ignore_index=True) if frames
+        else pd.DataFrame({"dimension": [], "valeur": [], "nb": [], "somme": []})
+    )
+    groups = groups.astype({"dimension": str, "valeur": str, "nb": "int64", "somme": "float64"})
+
+    if has_measure:
+        bins = np.floor(measure.dropna().to_numpy() / HIST_BIN_WIDTH).astype("int64")
+        classes, counts = np.unique(bins, return_counts=True)
+    else:
+        classes = counts = np.array([], dtype="int64")
+    hist = pd.DataFrame({"classe": classes.astype("int64"), "nb": counts.astype("int64")})
+
+    numeric = df.select_dtypes(include="number")
+    describe = (
+        numeric.describe().reset_index(names="stat") if not numeric.empty
+        else pd.DataFrame({"stat": []})
+    )
+    return {"groups": groups, "hist": hist, "describe": describe}
+
+
+# ==================== STOCKAGE PAR FICHIER MENSUEL ====================
+def _part_paths(xlsx_path, data_dir, cube_dir):
+    return {part: sidecar_path(xlsx_path, data_dir, cube_dir, f".{part}.parquet") for part in CUBE_PARTS}
+
+
+def build_month_cube(xlsx_path, df, data_dir=DATA_DIR, cube_dir=CUBE_DIR):
+    cube = compute_cube(df)
+    for part, path in _part_paths(xlsx_path, data_dir, cube_dir).items():
+        if path is not None:
+            write_sidecar(xlsx_path, cube[part], path)
+    _cube_cache.put(file_key(xlsx_path), cube)
+    return cube
+
+
+def cube_is_fresh(xlsx_path, data_dir=DATA_DIR, cube_dir=CUBE_DIR):
+    return all(sidecar_is_fresh(xlsx_path, p) for p in _part_paths(xlsx_path, data_dir, cube_dir).values())
+
+
+def month_cube(xlsx_path, data_dir=DATA_DIR, cube_dir=CUBE_DIR):
+    key = file_key(xlsx_path)
+    cube = _cube_cache.get(key)
+    if cube is not None:
+        return cube
+    if cube_is_fresh(xlsx_path, data_dir, cube_dir):
+        paths = _part_paths(xlsx_path, data_dir, cube_dir)
+        cube = {part: pd.read_parquet(p) for part, p in paths.items()}
+        _cube_cache.put(key, cube)
+        return cube
+    return build_month_cube(xlsx_path, load_month(xlsx_path), data_dir, cube_dir)
+
+
+def cube_for(df):
+    # Cube stocké si df est un fichier mensuel intact (sa version est encore
+    # celle du fichier), sinon calcul à la volée sur les lignes filtrées.
+    version = df.attrs.get(VERSION_ATTR)
+    if version and os.path.isfile(version[0]) and file_key(version[0]) == version:
+        with stage("cube.stocke"):
+            return month_cube(version[0])
+    with stage("cube.calcul", rows=len(df)):
+        return compute_cube(df)
+
+
+# ===================== CUMUL SUR PLUSIEURS MOIS =====================
+def range_cube(category, start, end, data_dir=DATA_DIR, cube_dir=CUBE_DIR):
+    # Somme et comptes s'additionnent d'un mois à l'autre ; describe ne se
+    # combine pas et n'est pas renvoyé.
+    cubes = [month_cube(path, data_dir, cube_dir) for _, path in prune(partitions(category, data_dir), start, end)]
+    if not cubes:
+        return compute_cube(pd.DataFrame())
+    groups = (
+        pd.concat([c["groups"] for c in cubes], ignore_index=True)
+        .groupby(["dimension", "valeur"], as_index=False)[["nb", "somme"]]
+        .sum()
+    )
+    hist = (
+        pd.concat([c["hist"] for c in cubes], ignore_index=True)
+        .groupby("classe", as_index=False)["nb"]
+        .sum()
+    )
+    return {"groups": groups, "hist": hist}
+
+
+# ======================== LECTURES DU CUBE ========================
+def dimension_counts(cube, dim):
+    # Équivalent de df[dim].value_counts() : colonnes [dim, "nb", "somme"]
+    groups = cube["groups"]
+    part = groups[groups["dimension"] == dim].drop(columns="dimension")
+    return part.rename(columns={"valeur": dim}).sort_values("nb", ascending=False, ignore_index=True)
+
+
+def histogram(cube, nbins=20):
+    # Regroupe les classes fines en ~nbins barres : [debut, fin, nb]
+    hist = cube["hist"]
+    if hist.empty:
+        return pd.DataFrame({"debut": [], "fin": [], "nb": []})
+    lo, hi = int(hist["classe"].min()), int(hist["classe"].max())
+    step = max(1, -(-(hi - lo + 1) // nbins))
+    coarse = (hist["classe"] - lo) // step
+    out = hist.groupby(coarse.rename("barre"))["nb"].sum().reset_index()
+    out["debut"] = (lo + out["barre"] * step) * HIST_BIN_WIDTH
+    out["fin"] = out["debut"] + step * HIST_BIN_WIDTH
+    return out[["debut", "fin", "nb"]]
+
+
+def daily_series(cube):
+    # Somme journalière de la mesure : [DATE, nb, somme] trié par date
+    part = dimension_counts(cube, DATE_DIMENSION)
+    part[DATE_DIMENSION] = pd.to_datetime(part[DATE_DIMENSION], errors="coerce")
+    return part.dropna(subset=[DATE_DIMENSION]).sort_values(DATE_DIMENSION, ignore_index=True)
+
+
+def describe(cube):
+    return cube["describe"].set_index("stat")
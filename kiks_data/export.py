@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from .config import EXPORT_DIR, STREAM_CHUNK_ROWS
+from .instrument import stage
+
+# format -> (type MIME, extension)
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+# Une feuille Excel compte au plus 1 048 576 lignes, en-tête compris
+XLSX_MAX_ROWS = 1_048_575
+# Les fichiers d'export plus anciens sont supprimés au prochain export
+EXPORT_MAX_AGE = 3600
+
+
+# ======================== BLOCS ========================
+def frame_chunks(df, chunk_rows=STREAM_CHUNK_ROWS):
+    # Tranches successives d'un DataFrame déjà en mémoire (pas de copie complète)
+    if df.empty:
+        yield df
+        return
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _as_table(chunk):
+    if isinstance(chunk, pd.DataFrame):
+        return pa.Table.from_pandas(chunk, preserve_index=False)
+    if isinstance(chunk, pa.RecordBatch):
+        return pa.Table.from_batches([chunk])
+    return chunk
+
+
+def _plain(table):
+    # Pour CSV : catégories décodées, dates à la seconde (pas de nanosecondes)
+    columns = []
+    for col in table.columns:
+        if pa.types.is_dictionary(col.type):
+            col = col.cast(col.type.value_type)
+        if pa.types.is_timestamp(col.type):
+            col = col.cast(pa.timestamp("s", col.type.tz), safe=False)
+        columns.append(col)
+    return pa.table(columns, names=table.column_names)
+
+
+# ======================== ÉCRIVAINS ========================
+def _write_csv(chunks, path):
+    rows = 0
+    with open(path, "wb") as f:
+        # BOM : Excel reconnaît alors l'UTF-8 (accents des désignations)
+        f.write(b"\xef\xbb\xbf")
+        writer = None
+        for chunk in chunks:
+            table = _plain(_as_table(chunk))
+            if writer is None:
+                writer = pacsv.CSVWriter(f, table.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _write_parquet(chunks, path):
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = _as_table(chunk)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            elif not table.schema.equals(writer.schema, check_metadata=False):
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(pa.table({}), path)
+    return rows
+
+
+def _write_xlsx(chunks, path):
+    # openpyxl en écriture seule : les lignes partent sur disque au fil de l'eau.
+    # Au-delà de XLSX_MAX_ROWS lignes, la suite continue sur une nouvelle feuille.
+    from openpyxl import Workbook  # chargé seulement pour un export XLSX
+
+    wb = Workbook(write_only=True)
+    ws, header, in_sheet, rows = None, None, 0, 0
+    for chunk in chunks:
+        df = chunk if isinstance(chunk, pd.DataFrame) else _as_table(chunk).to_pandas()
+        if header is None:
+            header = [str(c) for c in df.columns]
+        values = df.astype(object).where(df.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            if ws is None or in_sheet >= XLSX_MAX_ROWS:
+                ws = wb.create_sheet(f"Export {len(wb.worksheets) + 1}")
+                ws.append(header)
+                in_sheet = 0
+            ws.append(row)
+            in_sheet += 1
+        rows += len(df)
+    if ws is None:
+        wb.create_sheet("Export 1").append(header or [])
+    wb.save(path)
+    return rows
+
+
+WRITERS = {"csv": _write_csv, "parquet": _write_parquet, "xlsx": _write_xlsx}
+
+
+# ========================= EXPORT =========================
+def _purge(export_dir):
+    now = time.time()
+    for name in os.listdir(export_dir):
+        path = os.path.join(export_dir, name)
+        try:
+            if now - os.path.getmtime(path) > EXPORT_MAX_AGE:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def export(chunks, fmt, name="export", export_dir=EXPORT_DIR, digest=None):
+    # Écrit les blocs (DataFrame, RecordBatch ou Table Arrow) dans un fichier
+    # du format demandé ; un seul bloc est converti à la fois.
+    # digest : empreinte du contenu ; le fichier déjà écrit pour la même
+    # empreinte est réutilisé sans consommer les blocs (lignes : None).
+    # Renvoie (chemin, nombre de lignes).
+    if fmt not in WRITERS:
+        raise ValueError(f"Format d'export inconnu : {fmt} (attendu : {', '.join(FORMATS)})")
+    os.makedirs(export_dir, exist_ok=True)
+    _purge(export_dir)
+    path = os.path.join(export_dir, f"{name}-{digest[:16] if digest else uuid.uuid4().hex[:12]}.{FORMATS[fmt][1]}")
+    if digest and os.path.exists(path):
+        # Rafraîchit la date : le fichier reste hors de portée de _purge
+        os.utime(path)
+        return path, None
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with stage(f"export.{fmt}") as info:
+        try:
+            rows = WRITERS[fmt](chunks, tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        info.update(rows=rows, bytes=os.path.getsize(path))
+    return path, rows
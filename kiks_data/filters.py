@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from .cache import VERSION_ATTR, LRUDict
+from .instrument import stage
+
+# (version, colonne) -> liste des valeurs distinctes
+_distinct_cache = LRUDict(512)
+
+
+# ===================== VALEURS DISTINCTES =====================
+def filterable_columns(df):
+    # Texte ou catégorie (dtype.kind == "O" dans les deux cas)
+    return [col for col in df.columns if df[col].dtype.kind == "O"]
+
+
+def _compute_distinct(s):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy()
+        present = np.bincount(codes[codes >= 0], minlength=len(s.cat.categories)) > 0
+        return s.cat.categories[present].tolist()
+    return sorted(s.dropna().unique().tolist(), key=str)
+
+
+def distinct_values(df, col):
+    version = df.attrs.get(VERSION_ATTR)
+    if version is None:
+        return _compute_distinct(df[col])
+    key = (version, col)
+    values = _distinct_cache.get(key)
+    if values is None:
+        values = _compute_distinct(df[col])
+        _distinct_cache.put(key, values)
+    return values
+
+
+# ======================== MASQUE UNIQUE ========================
+def _column_mask(s, values):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # Comparaison sur les codes entiers plutôt que sur les chaînes
+        wanted = s.cat.categories.get_indexer(list(values))
+        return np.isin(s.cat.codes.to_numpy(), wanted[wanted >= 0])
+    return s.isin(list(values)).to_numpy()
+
+
+def build_mask(df, selections):
+    mask = None
+    for col, values in selections.items():
+        if not values:
+            continue
+        col_mask = _column_mask(df[col], values)
+        mask = col_mask if mask is None else mask & col_mask
+    return mask
+
+
+def apply_filters(df, selections):
+    # Toutes les sélections sont combinées en un seul masque booléen et le
+    # DataFrame n'est découpé qu'une fois ; sans sélection il est renvoyé tel quel.
+    mask = build_mask(df, selections)
+    if mask is None:
+        return df
+    with stage("filtres", rows=len(df)):
+        out = df[mask]
+    # Sous-ensemble : ce n'est plus la version en cache du jeu de données
+    out.attrs = {k: v for k, v in df.attrs.items() if k != VERSION_ATTR}
+    return out
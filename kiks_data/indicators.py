@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .cache import LRUDict
+from .catalog import get_catalog
+from .config import DATA_DIR, INDICATOR_DIR, PARQUET_DIR
+from .ingest import SIDECAR_FORMAT, convert_file, sidecar_is_fresh, sidecar_path
+from .instrument import stage
+
+# Séries suivies : une par catégorie × DESIGNATION × FLUX et par mesure présente
+KEYS = ["DESIGNATION", "FLUX"]
+MEASURES = ["TONNAGE", "Valeur FOB (USD)"]
+WINDOWS = (3, 12)
+# Un mois modifié change les indicateurs des 12 mois suivants (YoY, moyenne 12 mois)
+HORIZON = max(12, *WINDOWS)
+
+INDICATOR_COLUMNS = ["mom", "yoy"] + [f"mm{w}" for w in WINDOWS]
+_META_MONTHS = b"kiks.months"
+_META_FORMAT = b"kiks.format"
+
+# (catégorie, empreinte des mois) -> table des indicateurs
+_memo = LRUDict(64)
+_lock = threading.Lock()
+
+
+# ==================== TOTAUX D'UN MOIS ====================
+def month_totals(path, period, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR):
+    # Somme des mesures par DESIGNATION × FLUX, lue dans le miroir Parquet
+    sidecar = sidecar_path(path, data_dir, parquet_dir)
+    if not sidecar_is_fresh(path, sidecar):
+        convert_file(path, data_dir, parquet_dir)
+    names = set(pq.read_schema(sidecar).names)
+    measures = [m for m in MEASURES if m in names]
+    if not measures or not set(KEYS) <= names:
+        return pd.DataFrame(columns=[*KEYS, "period", "mesure", "valeur"])
+    df = pd.read_parquet(sidecar, columns=KEYS + measures)
+    sums = df.groupby(KEYS, observed=True)[measures].sum().reset_index()
+    long = sums.melt(id_vars=KEYS, value_vars=measures, var_name="mesure", value_name="valeur")
+    long.insert(len(KEYS), "period", period)
+    return long.astype({col: str for col in KEYS})
+
+
+# ================= CALCUL DES INDICATEURS =================
+def _shift(period, months):
+    return (pd.Period(period, "M") + months).strftime("%Y-%m")
+
+
+def compute_indicators(base, periods, since):
+    # Indicateurs des mois >= since ; seuls les HORIZON mois précédents sont
+    # relus comme contexte. Un mois présent sans ligne pour une série vaut 0,
+    # un mois absent du catalogue reste vide (NaN).
+    if base.empty or not periods:
+        return pd.DataFrame(columns=[*KEYS, "period", "mesure", "valeur", *INDICATOR_COLUMNS])
+    start = _shift(since, -HORIZON)
+    part = base[base["period"] >= start]
+    wide = part.pivot_table(index="period", columns=["mesure", *KEYS], values="valeur", aggfunc="sum")
+    months = pd.period_range(start, periods[-1], freq="M").strftime("%Y-%m")
+    wide = wide.reindex(months)
+    wide.loc[wide.index.isin(periods)] = wide.loc[wide.index.isin(periods)].fillna(0.0)
+
+    frames = {
+        "valeur": wide,
+        "mom": wide.pct_change(1, fill_method=None),
+        "yoy": wide.pct_change(12, fill_method=None),
+    }
+    for w in WINDOWS:
+        frames[f"mm{w}"] = wide.rolling(w, min_periods=w).mean()
+
+    tail = wide.index[(wide.index >= since) & wide.index.isin(periods)]
+    long = pd.concat(
+        {name: frame.loc[tail].stack(["mesure", *KEYS], future_stack=True) for name, frame in frames.items()},
+        axis=1,
+    )
+    long.index = long.index.set_names("period", level=0)
+    long = long.reset_index().replace([np.inf, -np.inf], np.nan)
+    # Séries absentes de la fenêtre (aucune tonne sur toute la plage)
+    long = long[long["valeur"].notna()]
+    return long[[*KEYS, "period", "mesure", "valeur", *INDICATOR_COLUMNS]]
+
+
+# ======================== STOCKAGE ========================
+def _store_path(category, indicator_dir=INDICATOR_DIR):
+    return os.path.join(indicator_dir, f"{category}.parquet")
+
+
+def _read_store(path):
+    if not os.path.exists(path):
+        return None, {}
+    try:
+        table = pq.read_table(path)
+    except (OSError, pa.ArrowInvalid):
+        return None, {}
+    meta = table.schema.metadata or {}
+    if meta.get(_META_FORMAT) != SIDECAR_FORMAT.encode():
+        return None, {}
+    months = json.loads(meta.get(_META_MONTHS, b"{}"))
+    return table.to_pandas(), months
+
+
+def _write_store(path, df, months):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[_META_MONTHS] = json.dumps(months, sort_keys=True).encode()
+    meta[_META_FORMAT] = SIDECAR_FORMAT.encode()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table.replace_schema_metadata(meta), tmp)
+    os.replace(tmp, path)
+
+
+def _month_versions(category, data_dir):
+    return {
+        e["period"]: f"{e['path']}|{e['mtime_ns']}|{e['size']}"
+        for e in get_catalog(data_dir).entries(category) if e["period"]
+    }
+
+
+def update_indicators(category, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR, indicator_dir=INDICATOR_DIR):
+    # Mise à jour incrémentale : seuls les mois nouveaux ou modifiés sont relus
+    # et seuls les indicateurs à partir du premier d'entre eux sont recalculés.
+    # Renvoie (table, nombre de mois relus).
+    months = _month_versions(category, data_dir)
+    digest = hashlib.sha1(json.dumps(months, sort_keys=True).encode()).hexdigest()
+    key = (os.path.abspath(data_dir), category, digest)
+    table = _memo.get(key)
+    if table is not None:
+        return table, 0
+
+    with _lock, stage("indicateurs", rows=None) as info:
+        path = _store_path(category, indicator_dir)
+        stored, stored_months = _read_store(path)
+        changed = sorted(p for p, v in months.items() if stored_months.get(p) != v)
+        removed = sorted(p for p in stored_months if p not in months)
+        periods = sorted(months)
+
+        if not changed and not removed:
+            # Rien de nouveau, ou aucun fichier nommé AAAA_MM : rien à recalculer
+            table = stored if stored is not None else compute_indicators(pd.DataFrame(), [], None)
+        else:
+            base = (stored[[*KEYS, "period", "mesure", "valeur"]] if stored is not None
+                    else pd.DataFrame(columns=[*KEYS, "period", "mesure", "valeur"]))
+            base = base[~base["period"].isin(changed + removed)]
+            entries = {e["period"]: e["path"] for e in get_catalog(data_dir).entries(category) if e["period"]}
+            fresh = [month_totals(entries[p], p, data_dir, parquet_dir) for p in changed]
+            frames = [f for f in [base, *fresh] if not f.empty]
+            base = (pd.concat(frames, ignore_index=True) if frames else base).astype({"valeur": "float64"})
+
+            since = min(changed + removed)
+            tail = compute_indicators(base, periods, since)
+            head = stored[stored["period"] < since] if stored is not None else tail.iloc[:0]
+            table = (pd.concat([head, tail], ignore_index=True)
+                     .sort_values(["mesure", *KEYS, "period"], ignore_index=True))
+            _write_store(path, table, months)
+            info["rows"] = len(changed)
+        _memo.put(key, table)
+        return table, len(changed) + len(removed)
+
+
+def indicators(category, data_dir=DATA_DIR):
+    return update_indicators(category, data_dir)[0].copy()
@@ -0,0 +1,100 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .cache import cached_read
+from .config import DATA_DIR, PARQUET_DIR
+from .instrument import stage
+from .memory import compact
+from .schema import SECTOR_SCHEMA, coerce, schema_for_path
+
+# Clés de métadonnées Parquet décrivant la version du .xlsx source
+_META_MTIME = b"kiks.source_mtime_ns"
+_META_SIZE = b"kiks.source_size"
+# Version du format des fichiers dérivés : l'incrémenter (ex: changement de
+# schéma) rend tous les miroirs, cubes et index périmés
+_META_FORMAT = b"kiks.format"
+SIDECAR_FORMAT = "2"
+
+
+def to_typed(df, schema=SECTOR_SCHEMA):
+    # Typage à l'ingestion : les lecteurs reçoivent des colonnes déjà typées
+    return coerce(df, schema)
+
+
+# ====================== MIROIR PARQUET =========================
+def sidecar_path(xlsx_path, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR, suffix=".parquet"):
+    # data/<cat>/<année>/<mois>.xlsx -> <parquet_dir>/<cat>/<année>/<mois><suffix>
+    rel = os.path.relpath(os.path.abspath(xlsx_path), os.path.abspath(data_dir))
+    if rel.startswith(os.pardir):
+        return None
+    return os.path.join(parquet_dir, os.path.splitext(rel)[0] + suffix)
+
+
+def sidecar_is_fresh(xlsx_path, parquet_path):
+    if parquet_path is None or not os.path.exists(parquet_path):
+        return False
+    st = os.stat(xlsx_path)
+    try:
+        meta = pq.read_schema(parquet_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    return (meta.get(_META_MTIME) == str(st.st_mtime_ns).encode()
+            and meta.get(_META_SIZE) == str(st.st_size).encode()
+            and meta.get(_META_FORMAT) == SIDECAR_FORMAT.encode())
+
+
+def write_sidecar(xlsx_path, df, parquet_path):
+    st = os.stat(xlsx_path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[_META_MTIME] = str(st.st_mtime_ns).encode()
+    meta[_META_SIZE] = str(st.st_size).encode()
+    meta[_META_FORMAT] = SIDECAR_FORMAT.encode()
+    table = table.replace_schema_metadata(meta)
+
+    # Écriture atomique : un lecteur concurrent ne voit jamais un fichier partiel
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, parquet_path)
+
+
+def convert_file(xlsx_path, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR):
+    df = to_typed(pd.read_excel(xlsx_path), schema_for_path(xlsx_path, data_dir))
+    parquet_path = sidecar_path(xlsx_path, data_dir, parquet_dir)
+    if parquet_path is not None:
+        write_sidecar(xlsx_path, df, parquet_path)
+    return df
+
+
+def read_month(xlsx_path, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR):
+    # Lecture transparente : Parquet s'il est à jour, sinon Excel (et on
+    # régénère le miroir au passage pour les lectures suivantes).
+    parquet_path = sidecar_path(xlsx_path, data_dir, parquet_dir)
+    if sidecar_is_fresh(xlsx_path, parquet_path):
+        with stage("lecture.parquet", nbytes=os.path.getsize(parquet_path)) as info:
+            df = pd.read_parquet(parquet_path)
+            info["rows"] = len(df)
+        return df
+    with stage("lecture.excel", nbytes=os.path.getsize(xlsx_path)) as info:
+        df = to_typed(pd.read_excel(xlsx_path), schema_for_path(xlsx_path, data_dir))
+        info["rows"] = len(df)
+    if parquet_path is not None:
+        try:
+            write_sidecar(xlsx_path, df, parquet_path)
+        except OSError:
+            pass  # Miroir en lecture seule : on se contente de l'Excel
+    return df
+
+
+def _read_compact(path):
+    return compact(read_month(path))
+
+
+def load_month(path):
+    # Point d'entrée des pages : cache mémoire, puis miroir Parquet, puis Excel.
+    # La version en cache est compactée (catégories, entiers réduits).
+    return cached_read(path, _read_compact)
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from .config import PERF_LOG
+
+# Relance en cours du thread (Streamlit exécute chaque session dans son thread)
+_local = threading.local()
+# Dernières relances, toutes sessions confondues, pour le panneau de debug
+history = deque(maxlen=50)
+
+logger = logging.getLogger("kiks_data.perf")
+_log_lock = threading.Lock()
+
+
+# ===================== TRACE D'UNE RELANCE =====================
+class RerunTrace:
+    """Étapes chronométrées et compteurs d'une exécution du script."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.stages = []  # dicts stage, depth, seconds, rows, bytes (ordre de début)
+        self.counters = {}
+        self.depth = 0
+
+    def elapsed(self):
+        return time.perf_counter() - self._t0
+
+    def as_record(self):
+        return {
+            "page": self.page,
+            "started_at": round(self.started_at, 3),
+            "seconds": round(self.elapsed(), 6),
+            "stages": [dict(s) for s in self.stages],
+            "counters": dict(self.counters),
+        }
+
+
+def start_rerun(page):
+    _local.trace = RerunTrace(page)
+
+
+def current():
+    return getattr(_local, "trace", None)
+
+
+def end_rerun():
+    # Clôt la relance, l'ajoute à l'historique et l'écrit dans le journal
+    trace = current()
+    if trace is None:
+        return None
+    _local.trace = None
+    record = trace.as_record()
+    history.append(record)
+    _configure_log()
+    logger.info(json.dumps(record, ensure_ascii=False, default=str))
+    return record
+
+
+# ========================= MESURES =========================
+@contextmanager
+def stage(name, rows=None, nbytes=None):
+    # Sans relance en cours (CLI, processus de travail, bench) : aucun coût.
+    # L'appelant peut compléter info["rows"] / info["bytes"] après coup.
+    trace = current()
+    if trace is None:
+        yield {}
+        return
+    info = {"stage": name, "depth": trace.depth, "seconds": None, "rows": rows, "bytes": nbytes}
+    trace.stages.append(info)
+    trace.depth += 1
+    t0 = time.perf_counter()
+    try:
+        yield info
+    finally:
+        info["seconds"] = round(time.perf_counter() - t0, 6)
+        trace.depth -= 1
+
+
+def count(name, n=1):
+    trace = current()
+    if trace is not None:
+        trace.counters[name] = trace.counters.get(name, 0) + n
+
+
+# ===================== JOURNAL STRUCTURÉ =====================
+def _configure_log():
+    # Une ligne JSON par relance ; KIKS_PERF_LOG vide désactive le fichier
+    if logger.handlers or not PERF_LOG:
+        return
+    with _log_lock:
+        if logger.handlers:
+            return
+        os.makedirs(os.path.dirname(PERF_LOG) or ".", exist_ok=True)
+        handler = RotatingFileHandler(PERF_LOG, maxBytes=10 * 1024 * 1024, backupCount=3, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
@@ -0,0 +1,173 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .config import JOB_WORKERS, JOBS_DIR
+
+PENDING, RUNNING, DONE, FAILED = "en attente", "en cours", "terminé", "échec"
+
+
+# ================= PROGRESSION (côté processus de travail) =================
+def _progress_path(job_id, jobs_dir=JOBS_DIR):
+    return os.path.join(jobs_dir, f"{job_id}.json")
+
+
+def report_progress(job_id, fraction, stage, jobs_dir=JOBS_DIR):
+    # Écrit depuis le processus de travail, relu par Job.progress() côté serveur
+    if job_id is None:
+        return
+    os.makedirs(jobs_dir, exist_ok=True)
+    path = _progress_path(job_id, jobs_dir)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"fraction": fraction, "stage": stage}, f)
+    os.replace(tmp, path)
+
+
+def _call(job_id, fn, args, kwargs, with_progress):
+    if with_progress:
+        kwargs = dict(kwargs, job_id=job_id)
+    return fn(*args, **kwargs)
+
+
+# ============================ TÂCHES ============================
+class Job:
+    def __init__(self, job_id, key, label, meta=None):
+        self.id = job_id
+        self.key = key
+        self.label = label
+        self.meta = meta or {}
+        self.submitted = time.time()
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.future = None
+
+    @property
+    def status(self):
+        if self.error is not None:
+            return FAILED
+        if self.finished is not None:
+            return DONE
+        return RUNNING if self.future is not None and self.future.running() else PENDING
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    def progress(self):
+        # (fraction, étape) : lue dans le fichier écrit par le processus de travail
+        if self.done:
+            return 1.0, self.status
+        try:
+            with open(_progress_path(self.id), encoding="utf-8") as f:
+                p = json.load(f)
+            return p["fraction"], p["stage"]
+        except (OSError, ValueError, KeyError):
+            return 0.0, self.status
+
+    def as_row(self):
+        end = self.finished or time.time()
+        return {
+            "id": self.id,
+            "tâche": self.label,
+            "statut": self.status,
+            "durée (s)": round(end - self.submitted, 2),
+            "erreur": self.error,
+        }
+
+
+class JobQueue:
+    """Pool de processus partagé par toutes les sessions, avec table des tâches.
+
+    Deux soumissions avec la même clé renvoient la même tâche tant qu'elle
+    n'a pas échoué : une requête lourde identique n'est calculée qu'une fois.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, max_jobs=200):
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self._executor = None
+        self._jobs = OrderedDict()  # id -> Job
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn : ne pas dupliquer par fork les threads du serveur Streamlit
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, key, fn, *args, label=None, meta=None, with_progress=False, **kwargs):
+        with self._lock:
+            existing = self._jobs.get(self._by_key.get(key))
+            if existing is not None and existing.error is None:
+                return existing.id
+            job = Job(uuid.uuid4().hex[:12], key, label or fn.__name__, meta)
+            job.future = self._pool().submit(_call, job.id, fn, args, kwargs, with_progress)
+            self._register(job)
+        job.future.add_done_callback(lambda future: self._finish(job, future))
+        return job.id
+
+    def completed(self, key, result, label, meta=None):
+        # Enregistre un résultat déjà disponible (ex: rapport relu du disque)
+        with self._lock:
+            existing = self._jobs.get(self._by_key.get(key))
+            if existing is not None and existing.error is None:
+                return existing.id
+            job = Job(uuid.uuid4().hex[:12], key, label, meta)
+            job.result, job.finished = result, job.submitted
+            self._register(job)
+        return job.id
+
+    def forget(self, key):
+        # Résultat d'une tâche terminée devenu inutilisable (ex: fichier supprimé) :
+        # la prochaine soumission avec cette clé relance le calcul
+        with self._lock:
+            job = self._jobs.get(self._by_key.get(key))
+            if job is not None and job.done:
+                del self._by_key[key]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def table(self):
+        with self._lock:
+            return [job.as_row() for job in reversed(self._jobs.values())]
+
+    def _register(self, job):
+        self._jobs[job.id] = job
+        self._by_key[job.key] = job.id
+        # On n'oublie que des tâches terminées, les plus anciennes d'abord
+        for old in [j for j in self._jobs.values() if j.done][: max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[old.id]
+            if self._by_key.get(old.key) == old.id:
+                del self._by_key[old.key]
+
+    def _finish(self, job, future):
+        try:
+            job.result = future.result()
+        except BrokenProcessPool as e:
+            job.error = f"Processus de travail interrompu : {e}"
+            with self._lock:
+                self._executor = None  # recréé à la prochaine soumission
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+        job.finished = time.time()
+        try:
+            os.remove(_progress_path(job.id))
+        except OSError:
+            pass
+
+
+# Instance unique par processus serveur
+job_queue = JobQueue()
@@ -0,0 +1,63 @@
+import pandas as pd
+
+# Texte converti en catégorie si (valeurs distinctes / lignes) reste sous ce seuil
+CATEGORY_MAX_RATIO = 0.5
+
+
+# ======================= COMPACTAGE =======================
+def compact(df):
+    # Représentation mémoire compacte d'un DataFrame déjà typé :
+    # - texte peu varié -> category (les filtres et groupby travaillent sur les codes)
+    # - catégories remises dans l'ordre alphabétique
+    # - entiers -> plus petit type entier qui contient les valeurs
+    # Les flottants restent en float64 : les sommes de TONNAGE en float32
+    # dériveraient au centime près sur plusieurs années.
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if s.dtype == object:
+            if len(s) and s.nunique(dropna=True) <= len(s) * CATEGORY_MAX_RATIO:
+                out[col] = s.astype("category")
+        elif isinstance(s.dtype, pd.CategoricalDtype):
+            # Dictionnaires unifiés sur plusieurs fichiers : ordre d'apparition.
+            # Catégories triées pour que tri et listes de filtres restent alphabétiques.
+            if not s.cat.categories.is_monotonic_increasing:
+                out[col] = s.cat.reorder_categories(sorted(s.cat.categories, key=str))
+        elif pd.api.types.is_integer_dtype(s.dtype):
+            small = pd.to_numeric(s, downcast="integer")
+            if small.dtype != s.dtype:
+                out[col] = small
+    if not out:
+        return df
+    compacted = df.assign(**out)
+    compacted.attrs = dict(df.attrs)
+    return compacted
+
+
+# ====================== RAPPORT MÉMOIRE ======================
+def _wide_nbytes(s):
+    # Taille de la même colonne sans compactage (objets Python / 64 bits)
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return int(s.astype(object).memory_usage(index=False, deep=True))
+    if pd.api.types.is_integer_dtype(s.dtype):
+        return len(s) * 8 + (len(s) if isinstance(s.dtype, pd.api.extensions.ExtensionDtype) else 0)
+    return int(s.memory_usage(index=False, deep=True))
+
+
+def memory_report(df):
+    # Une ligne par colonne : type, octets actuels, octets sans compactage
+    rows = []
+    for col in df.columns:
+        s = df[col]
+        nbytes = int(s.memory_usage(index=False, deep=True))
+        wide = _wide_nbytes(s)
+        rows.append({"colonne": col, "type": str(s.dtype), "octets": nbytes, "octets_sans_compactage": wide,
+                     "gain": round(1 - nbytes / wide, 3) if wide else 0.0})
+    report = pd.DataFrame(rows, columns=["colonne", "type", "octets", "octets_sans_compactage", "gain"])
+    total = report[["octets", "octets_sans_compactage"]].sum()
+    report.loc[len(report)] = {
+        "colonne": "TOTAL", "type": f"{len(df)} lignes", "octets": int(total["octets"]),
+        "octets_sans_compactage": int(total["octets_sans_compactage"]),
+        "gain": round(1 - total["octets"] / total["octets_sans_compactage"], 3) if total["octets_sans_compactage"] else 0.0,
+    }
+    return report
@@ -0,0 +1,164 @@
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .anomalies import detect
+from .cache import file_key, frame_cache
+from .catalog import get_catalog, period_of
+from .config import CUBE_DIR, DATA_DIR, PARQUET_DIR
+from .cube import build_month_cube, cube_is_fresh
+from .jobs import report_progress
+from .indicators import update_indicators
+from .ingest import sidecar_is_fresh, sidecar_path, to_typed, write_sidecar
+from .memory import compact
+from .schema import SECTOR_SCHEMA, SchemaError, coerce, schema_for, schema_for_path
+from .search import build_month_terms, terms_are_fresh
+from .streaming import COPY_BUFFER, iter_excel_chunks
+
+
+# ================= IMPORT INCRÉMENTAL D'UN FICHIER =================
+def import_upload(fileobj, category, year, filename, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR):
+    # Valide le classeur, le publie dans data/ puis ne reconstruit que ce qui
+    # dépend de ce mois : miroir Parquet, cube d'agrégats et caches. Rien n'est écrit dans
+    # data/ si le fichier est invalide.
+    period = period_of(filename, year)
+    if period is None:
+        raise SchemaError("Le nom du fichier doit se terminer par AAAA_MM.xlsx (ex: 2024_05.xlsx) "
+                          "ou être MM.xlsx (ex: 05.xlsx, ancienne convention)")
+    if period[:4] != str(year):
+        raise SchemaError(f"Le fichier {filename} concerne {period[:4]} : il ne peut pas être classé dans {year}")
+    # Un mois = un fichier : 05.xlsx et 2024_05.xlsx ne peuvent coexister
+    doublons = [e["month"] for e in get_catalog(data_dir).entries(category, str(year))
+                if e["period"] == period and e["month"] != filename]
+    if doublons:
+        raise SchemaError(f"Le mois {period} existe déjà sous le nom {doublons[0]} : importer sous ce nom pour le remplacer")
+
+    dest = os.path.join(data_dir, category, year, filename)
+    # Suffixe hors .xlsx : le fichier temporaire reste invisible pour list_months
+    tmp = f"{dest}.upload"
+    # Depuis le début : un second clic sur « Importer » relit le même objet
+    fileobj.seek(0)
+    with open(tmp, "wb") as f:
+        shutil.copyfileobj(fileobj, f, COPY_BUFFER)
+
+    try:
+        df = read_validated(tmp, schema_for(category))
+    except SchemaError:
+        os.remove(tmp)
+        raise
+    os.replace(tmp, dest)
+
+    typed = refresh_month(dest, df, data_dir, parquet_dir)
+    # Seuls les indicateurs du mois importé jusqu'à la fin des séries sont recalculés
+    update_indicators(category, data_dir, parquet_dir)
+    detect(category, data_dir, parquet_dir)
+    return typed
+
+
+def read_validated(path, schema=SECTOR_SCHEMA):
+    # Lecture par blocs : un fichier invalide est rejeté dès le premier bloc
+    # fautif, sans avoir été chargé entièrement. Chaque bloc est typé en même
+    # temps qu'il est validé.
+    chunks = []
+    try:
+        for chunk in iter_excel_chunks(path):
+            chunks.append(coerce(chunk, schema, strict=True))
+    except SchemaError:
+        raise
+    except Exception as e:
+        raise SchemaError(f"Fichier Excel illisible : {e}") from e
+    if not chunks:
+        raise SchemaError("Le fichier ne contient aucune ligne")
+    # Les modalités diffèrent d'un bloc à l'autre : concat repasse en objet,
+    # coerce ne retype que ces colonnes-là
+    return coerce(pd.concat(chunks, ignore_index=True), schema)
+
+
+def build_month_files(path, df, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR, cube_dir=CUBE_DIR):
+    # Fichiers dérivés d'un mois (miroir Parquet, cube, index de recherche).
+    # Sans effet sur les caches mémoire ni sur le catalogue : utilisable
+    # depuis un processus de travail.
+    typed = to_typed(df, schema_for_path(path, data_dir))
+    parquet_path = sidecar_path(path, data_dir, parquet_dir)
+    if parquet_path is not None:
+        write_sidecar(path, typed, parquet_path)
+    build_month_cube(path, typed, data_dir, cube_dir)
+    build_month_terms(path, typed, data_dir)
+    return typed
+
+
+def refresh_month(path, df, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR, cube_dir=CUBE_DIR):
+    # Met à jour les données dérivées d'un mois déjà publié dans data/
+    typed = build_month_files(path, df, data_dir, parquet_dir, cube_dir)
+    # Les lecteurs voient le nouveau mois dès le rerun suivant, sans relire l'Excel
+    frame_cache.invalidate(path)
+    frame_cache.put(file_key(path), compact(typed))
+    get_catalog(data_dir, watch=False).update_file(path)
+    return typed
+
+
+def convert_files(paths, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR, job_id=None):
+    # Tâche de fond (processus du pool) : conversion de quelques mois avec
+    # progression ; la page relit ensuite les miroirs Parquet
+    for i, path in enumerate(paths):
+        report_progress(job_id, i / len(paths), f"{os.path.basename(path)} ({i + 1}/{len(paths)})")
+        build_month_files(path, pd.read_excel(path), data_dir, parquet_dir)
+    return len(paths)
+
+
+# ====================== INGESTION EN MASSE ======================
+def iter_month_files(data_dir=DATA_DIR, categories=None):
+    # Même arborescence que celle des sélecteurs de navigation (catalogue)
+    for entry in get_catalog(data_dir, watch=False).table().itertuples():
+        if not categories or entry.category in categories:
+            yield entry.path
+
+
+def _ingest_one(path, data_dir, parquet_dir, force):
+    # Exécuté dans un processus du pool : ne renvoie que des types simples
+    t0 = time.perf_counter()
+    result = {"path": path, "status": "ok", "rows": None, "seconds": 0.0, "error": None}
+    try:
+        parquet_path = sidecar_path(path, data_dir, parquet_dir)
+        fresh = (sidecar_is_fresh(path, parquet_path) and cube_is_fresh(path, data_dir)
+                 and terms_are_fresh(path, data_dir))
+        if not force and fresh:
+            result["status"] = "fresh"
+            result["rows"] = pq.read_metadata(parquet_path).num_rows
+        else:
+            result["rows"] = len(build_month_files(path, pd.read_excel(path), data_dir, parquet_dir))
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - t0, 4)
+    return result
+
+
+def ingest_all(data_dir=DATA_DIR, parquet_dir=PARQUET_DIR, categories=None,
+               workers=None, force=False, on_result=None):
+    paths = list(iter_month_files(data_dir, categories))
+    results = []
+    catalog = get_catalog(data_dir, watch=False)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_ingest_one, p, data_dir, parquet_dir, force) for p in paths]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            # Les processus de travail n'écrivent que des fichiers : caches
+            # mémoire et catalogue sont mis à jour ici, dans le processus parent
+            if result["status"] == "ok":
+                frame_cache.invalidate(result["path"])
+                catalog.update_file(result["path"])
+            if on_result is not None:
+                on_result(result)
+    # Indicateurs mensuels et anomalies : un seul écrivain par catégorie, après les conversions.
+    # Une catégorie sans fichier nommé AAAA_MM n'a pas de série mensuelle.
+    for category in sorted({e["category"] for e in catalog.entries() if e["period"]}):
+        if not categories or category in categories:
+            update_indicators(category, data_dir, parquet_dir)
+            detect(category, data_dir, parquet_dir)
+    return sorted(results, key=lambda r: r["path"])
@@ -0,0 +1,81 @@
+import hashlib
+import os
+
+from .cache import VERSION_ATTR, content_hash
+from .config import PROFILE_DIR, PROFILE_SAMPLE_ROWS
+from .jobs import job_queue, report_progress
+
+
+# ===================== RAPPORTS EN CACHE =====================
+def _report_path(key, profile_dir=PROFILE_DIR):
+    return os.path.join(profile_dir, f"{key}.html")
+
+
+def report_html(job):
+    # Le HTML reste sur disque : les rapports ne s'accumulent pas en mémoire.
+    # None si le fichier a été supprimé depuis : le rapport est à recalculer.
+    try:
+        with open(job.result, encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def data_digest(df):
+    # Mois intact (version du fichier dans df.attrs) : pas de parcours des
+    # lignes ; sinon empreinte du contenu (ex: DataFrame filtré)
+    version = df.attrs.get(VERSION_ATTR)
+    if version is not None:
+        return hashlib.sha1(repr(version).encode()).hexdigest()
+    return content_hash(df)
+
+
+# ================ CALCUL (processus de travail) ================
+def render_profile(df, title, sampled, report_path, job_id=None):
+    from ydata_profiling import ProfileReport  # import lourd, seulement ici
+
+    if sampled:
+        # df est déjà l'échantillon (tiré avant l'envoi au processus)
+        profile = ProfileReport(df, title=title, minimal=True, progress_bar=False)
+    else:
+        profile = ProfileReport(df, title=title, explorative=True, progress_bar=False)
+
+    report_progress(job_id, 0.1, "Calcul des statistiques")
+    profile.description_set
+    report_progress(job_id, 0.7, "Construction du rapport")
+    profile.report
+    report_progress(job_id, 0.85, "Rendu HTML")
+    html = profile.to_html()
+
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    tmp = f"{report_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(html)
+    os.replace(tmp, report_path)
+    return report_path
+
+
+# ======================= SOUMISSION =======================
+def submit_profile(df, title="Profiling Report", total_rows=None, digest=None, profile_dir=PROFILE_DIR):
+    # Renvoie immédiatement l'identifiant de la tâche ; le rapport est calculé
+    # dans le pool de processus, ou relu depuis le disque s'il existe déjà.
+    # total_rows : taille réelle quand df est déjà un échantillon (lecture en flux).
+    # digest : data_digest(df) déjà calculé par l'appelant.
+    if digest is None:
+        digest = data_digest(df)
+    n_rows = len(df) if total_rows is None else total_rows
+    sampled = n_rows > PROFILE_SAMPLE_ROWS
+    key = f"{digest}-{'echantillon' if sampled else 'complet'}"
+    path = _report_path(key, profile_dir)
+    meta = {"digest": digest, "n_rows": n_rows, "sampled": sampled}
+    label = f"Profiling ({n_rows} lignes)"
+
+    if os.path.exists(path):
+        return job_queue.completed(("profil", key), path, label, meta)
+    # Rapport absent du disque : une tâche terminée pour cette clé ne sert plus
+    job_queue.forget(("profil", key))
+    if sampled and len(df) > PROFILE_SAMPLE_ROWS:
+        # Échantillon tiré ici : seules ces lignes sont copiées vers le processus
+        df = df.sample(n=PROFILE_SAMPLE_ROWS, random_state=0)
+    return job_queue.submit(("profil", key), render_profile, df, title, sampled, path,
+                            label=label, meta=meta, with_progress=True)
@@ -0,0 +1,130 @@
+import os
+
+import pandas as pd
+
+from .config import DATA_DIR
+
+
+class SchemaError(ValueError):
+    pass
+
+
+# ===================== REGISTRE DES SCHÉMAS =====================
+# Types cibles : category (modalités répétées), text (libellés libres),
+# int (entier nullable : même type Parquet d'un mois à l'autre), float, date.
+class Schema:
+    """Colonnes d'un type de classeur et leur type une fois ingérées.
+
+    Les colonnes de ``required`` doivent être présentes ; les autres colonnes
+    connues sont typées si elles existent, les colonnes inconnues sont laissées
+    telles quelles.
+    """
+
+    def __init__(self, name, columns, required=None, date_format=None):
+        self.name = name
+        self.columns = dict(columns)
+        self.required = list(self.columns if required is None else required)
+        self.date_format = date_format
+
+    def of_kind(self, kind):
+        return [col for col, k in self.columns.items() if k == kind]
+
+    def missing(self, columns):
+        return [col for col in self.required if col not in columns]
+
+
+# Fichiers produits par genere.py et présents dans tous les dossiers de data/
+SECTOR_SCHEMA = Schema(
+    "secteur",
+    {
+        "N°": "int", "ZONE": "category", "PROVINCE": "category", "BUREAU": "category",
+        "OPERATEUR": "category", "DESIGNATION": "category", "CATEGORIE": "category",
+        "FLUX": "category", "TONNAGE": "float", "DATE": "date",
+    },
+    date_format="%Y-%m-%d",
+)
+
+# Classeurs d'échanges téléversés dans app3.py (valeur FOB par pays)
+TRADE_SCHEMA = Schema(
+    "echanges",
+    {"Pays": "text", "Valeur FOB (USD)": "float"},
+)
+
+# Catégorie de data/ -> schéma. Les fichiers Douane_AAAA_MM.xlsx reprennent
+# les colonnes sectorielles ; une catégorie absente suit le schéma sectoriel.
+CATEGORY_SCHEMAS = {"douane": SECTOR_SCHEMA}
+
+
+def register_schema(category, schema):
+    CATEGORY_SCHEMAS[category] = schema
+
+
+def schema_for(category):
+    return CATEGORY_SCHEMAS.get(category, SECTOR_SCHEMA)
+
+
+def schema_for_path(path, data_dir=DATA_DIR):
+    # data/<cat>/<année>/<mois>.xlsx -> schéma de <cat>
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(data_dir)).split(os.sep)
+    return schema_for(rel[0] if len(rel) == 3 and rel[0] != os.pardir else None)
+
+
+# ==================== VALIDATION ET TYPAGE ====================
+def _to_dates(s, date_format):
+    # Format attendu d'abord (rapide), puis repli générique pour les cellules
+    # au format date d'Excel ou écrites autrement
+    if date_format is None:
+        return pd.to_datetime(s, errors="coerce")
+    out = pd.to_datetime(s, format=date_format, errors="coerce")
+    rest = out.isna() & s.notna()
+    if rest.any():
+        out[rest] = pd.to_datetime(s[rest], errors="coerce")
+    return out
+
+
+def _convert(s, kind, date_format):
+    # Renvoie (série typée, nombre de valeurs non convertibles) ; None si la
+    # série est déjà au bon type
+    if kind == "category":
+        return (None if isinstance(s.dtype, pd.CategoricalDtype) else s.astype("category")), 0
+    if kind == "date":
+        if pd.api.types.is_datetime64_any_dtype(s):
+            return None, 0
+        out = _to_dates(s, date_format)
+    elif kind == "float":
+        if s.dtype == "float64":
+            return None, 0
+        out = pd.to_numeric(s, errors="coerce").astype("float64")
+    elif kind == "int":
+        if s.dtype == "Int64":
+            return None, 0
+        num = pd.to_numeric(s, errors="coerce")
+        num = num.where(num.isna() | (num == num.round()))
+        out = num.astype("Int64")
+    else:
+        return None, 0
+    return out, int((out.isna() & s.notna()).sum())
+
+
+def coerce(df, schema=SECTOR_SCHEMA, strict=False):
+    # Typage vectorisé, colonne par colonne. En mode strict, toute valeur non
+    # convertible d'une colonne obligatoire lève SchemaError.
+    missing = schema.missing(df.columns)
+    if strict and missing:
+        raise SchemaError(f"Colonnes manquantes : {', '.join(missing)}")
+
+    typed = {}
+    for col, kind in schema.columns.items():
+        if col not in df.columns:
+            continue
+        out, bad = _convert(df[col], kind, schema.date_format)
+        if strict and bad and col in schema.required:
+            what = "reconnues comme dates" if kind == "date" else "numériques"
+            raise SchemaError(f"{bad} valeurs de {col} non {what}")
+        if out is not None:
+            typed[col] = out
+    return df.assign(**typed) if typed else df
+
+
+def validate(df, schema=SECTOR_SCHEMA):
+    coerce(df, schema, strict=True)
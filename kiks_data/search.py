@@ -0,0 +1,191 @@
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from .cache import LRUDict, file_key, frame_cache
+from .catalog import get_catalog
+from .config import DATA_DIR, INDEX_DIR, PARQUET_DIR
+from .ingest import load_month, sidecar_is_fresh, sidecar_path, write_sidecar
+
+# Colonnes texte indexées (Pays : fichiers douane au format FOB)
+SEARCH_COLUMNS = ["DESIGNATION", "OPERATEUR", "PROVINCE", "BUREAU", "Pays"]
+
+# file_key du .xlsx -> table des termes du mois
+_terms_cache = LRUDict(4096)
+
+
+# ====================== NORMALISATION ======================
+def normalize(text):
+    # "Fès" -> "fes", "KÉNITRA" -> "kenitra" : recherche insensible aux accents
+    text = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold().strip()
+
+
+def _words(text):
+    return [w for w in "".join(c if c.isalnum() else " " for c in text).split() if w]
+
+
+# =================== TERMES D'UN FICHIER MENSUEL ===================
+def compute_terms(df):
+    # Une ligne par (colonne, valeur distincte) : colonne, valeur, norm, nb
+    frames = []
+    for col in SEARCH_COLUMNS:
+        if col not in df.columns:
+            continue
+        counts = df[col].dropna().astype(str).value_counts()
+        frames.append(pd.DataFrame({"colonne": col, "valeur": counts.index, "nb": counts.to_numpy()}))
+    if not frames:
+        return pd.DataFrame({"colonne": [], "valeur": [], "norm": [], "nb": []}).astype({"nb": "int64"})
+    terms = pd.concat(frames, ignore_index=True)
+    terms["norm"] = terms["valeur"].map(normalize)
+    return terms[["colonne", "valeur", "norm", "nb"]].astype({"nb": "int64"})
+
+
+def _terms_path(xlsx_path, data_dir, index_dir):
+    return sidecar_path(xlsx_path, data_dir, index_dir, ".terms.parquet")
+
+
+def terms_are_fresh(xlsx_path, data_dir=DATA_DIR, index_dir=INDEX_DIR):
+    return sidecar_is_fresh(xlsx_path, _terms_path(xlsx_path, data_dir, index_dir))
+
+
+def build_month_terms(xlsx_path, df, data_dir=DATA_DIR, index_dir=INDEX_DIR):
+    terms = compute_terms(df)
+    path = _terms_path(xlsx_path, data_dir, index_dir)
+    if path is not None:
+        write_sidecar(xlsx_path, terms, path)
+    _terms_cache.put(file_key(xlsx_path), terms)
+    return terms
+
+
+def month_terms(xlsx_path, data_dir=DATA_DIR, index_dir=INDEX_DIR):
+    key = file_key(xlsx_path)
+    terms = _terms_cache.get(key)
+    if terms is None:
+        if terms_are_fresh(xlsx_path, data_dir, index_dir):
+            terms = pd.read_parquet(_terms_path(xlsx_path, data_dir, index_dir))
+            _terms_cache.put(key, terms)
+        else:
+            terms = build_month_terms(xlsx_path, load_month(xlsx_path), data_dir, index_dir)
+    return terms
+
+
+# ====================== INDEX INVERSÉ GLOBAL ======================
+class SearchIndex:
+    """Index inversé mot -> lignes de la table des termes, tous mois confondus.
+
+    La table des termes a une ligne par (mois, colonne, valeur) ; le
+    vocabulaire trié permet la recherche par préfixe par dichotomie.
+    """
+
+    def __init__(self, terms, version=None):
+        self.terms = terms.reset_index(drop=True)
+        self.version = version
+        words, rows = [], []
+        for i, norm in enumerate(self.terms["norm"].to_numpy()):
+            for w in set(_words(norm)):
+                words.append(w)
+                rows.append(i)
+        words = np.array(words, dtype=object)
+        rows = np.array(rows, dtype="int64")
+        order = np.argsort(words, kind="stable")
+        self.words = words[order].astype(str)
+        self.rows = rows[order]
+
+    def _prefix_rows(self, word):
+        lo = np.searchsorted(self.words, word, side="left")
+        hi = np.searchsorted(self.words, word + "\U0010ffff", side="left")
+        return self.rows[lo:hi]
+
+    def match(self, query):
+        # Chaque mot de la requête doit préfixer un mot de la valeur
+        words = _words(normalize(query))
+        if not words:
+            return self.terms.iloc[0:0]
+        hits = None
+        for w in words:
+            rows = np.unique(self._prefix_rows(w))
+            hits = rows if hits is None else np.intersect1d(hits, rows, assume_unique=True)
+            if len(hits) == 0:
+                break
+        return self.terms.iloc[hits]
+
+
+_index = {"version": None, "index": None}
+_index_lock = threading.Lock()
+
+
+def get_index(data_dir=DATA_DIR, index_dir=INDEX_DIR):
+    # Reconstruit l'index quand le catalogue change ; les termes des mois
+    # inchangés sont repris du cache, seul le mois importé est relu.
+    entries = get_catalog(data_dir).entries()
+    version = tuple(sorted((e["path"], e["mtime_ns"], e["size"]) for e in entries))
+    with _index_lock:
+        if _index["version"] == (data_dir, version):
+            return _index["index"]
+    frames = []
+    for e in entries:
+        terms = month_terms(e["path"], data_dir, index_dir).copy()
+        terms["category"], terms["period"], terms["path"] = e["category"], e["period"], e["path"]
+        frames.append(terms)
+    columns = ["colonne", "valeur", "norm", "nb", "category", "period", "path"]
+    terms = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    index = SearchIndex(terms, version=hash(version))
+    with _index_lock:
+        _index["version"], _index["index"] = (data_dir, version), index
+    return index
+
+
+# ========================== RECHERCHE ==========================
+def search(query, data_dir=DATA_DIR, index_dir=INDEX_DIR):
+    # Valeurs trouvées et nombre de lignes correspondantes par mois
+    hits = get_index(data_dir, index_dir).match(query)
+    values = (
+        hits.groupby(["colonne", "valeur"], as_index=False)["nb"].sum()
+        .sort_values("nb", ascending=False, ignore_index=True)
+    )
+    per_month = (
+        hits.groupby(["category", "period"], as_index=False)["nb"].sum()
+        .sort_values(["category", "period"], ignore_index=True)
+    )
+    return values, per_month
+
+
+def search_rows(query, limit=5000, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR, index_dir=INDEX_DIR):
+    # Lignes correspondantes, lues dans les miroirs Parquet des seuls mois touchés
+    index = get_index(data_dir, index_dir)
+    key = (f"search://{normalize(query)}", index.version, limit)
+    df = frame_cache.get(key)
+    if df is None:
+        df = _read_hits(index.match(query), limit, data_dir, parquet_dir)
+        frame_cache.put(key, df)
+    return df.copy()
+
+
+def _read_hits(hits, limit, data_dir, parquet_dir):
+    tables = []
+    n = 0
+    for path, month_hits in hits.groupby("path", sort=True):
+        sidecar = sidecar_path(path, data_dir, parquet_dir)
+        if not sidecar_is_fresh(path, sidecar):
+            load_month(path)  # régénère le miroir
+        expr = None
+        for col, part in month_hits.groupby("colonne"):
+            cond = pc.field(col).isin(part["valeur"].tolist())
+            expr = cond if expr is None else expr | cond
+        table = ds.dataset(sidecar, format="parquet").to_table(filter=expr)
+        entry = month_hits.iloc[0]
+        table = table.append_column("catégorie", pa.array([entry["category"]] * table.num_rows))
+        table = table.append_column("période", pa.array([entry["period"]] * table.num_rows))
+        tables.append(table.to_pandas())
+        n += table.num_rows
+        if n >= limit:
+            break
+    if not tables:
+        return pd.DataFrame()
+    return pd.concat(tables, ignore_index=True).head(limit)
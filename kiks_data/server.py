@@ -0,0 +1,81 @@
+# Point d'accès HTTP/JSON local : GET /<requête>?clé=valeur (voir api.ENDPOINTS).
+# Bibliothèque standard uniquement ; un thread par requête, mêmes caches
+# mémoire (FrameCache) et mêmes miroirs Parquet que les pages Streamlit.
+import json
+import os
+import shutil
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, quote, urlsplit
+
+from .api import ENDPOINTS, QueryError, call, parse_params
+from .config import DATA_DIR
+from .export import FORMATS
+from .instrument import end_rerun, start_rerun
+from .streaming import COPY_BUFFER
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Répond en JSON ; /export renvoie le fichier écrit par blocs."""
+
+    data_dir = DATA_DIR
+    server_version = "kiks-data"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        endpoint = url.path.strip("/")
+        # Chaque requête est chronométrée comme une relance de page (journal perf)
+        start_rerun(f"api:{endpoint or 'index'}")
+        try:
+            if not endpoint:
+                self._send_json(200, {"requetes": sorted(ENDPOINTS)})
+                return
+            result = call(endpoint, parse_params(parse_qsl(url.query)), self.data_dir)
+            if endpoint == "export":
+                self._send_file(result)
+            else:
+                self._send_json(200, result)
+        except QueryError as exc:
+            self._send_json(404 if endpoint not in ENDPOINTS else 400, {"erreur": str(exc)})
+        except Exception as exc:
+            self.log_error("%s : %r", self.path, exc)
+            self._send_json(500, {"erreur": str(exc)})
+        finally:
+            end_rerun()
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(self, result):
+        # Copie par blocs du fichier d'export, supprimé une fois envoyé
+        path = result["path"]
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", FORMATS[result["format"]][0])
+            self.send_header("Content-Length", str(os.path.getsize(path)))
+            self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(result['file_name'])}")
+            self.send_header("X-Rows", str(result["rows"]))
+            self.end_headers()
+            with open(path, "rb") as f:
+                shutil.copyfileobj(f, self.wfile, COPY_BUFFER)
+        finally:
+            os.remove(path)
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, data_dir=DATA_DIR):
+    handler = type("BoundQueryHandler", (QueryHandler,), {"data_dir": data_dir})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    print(f"kiks_data : http://{host}:{httpd.server_address[1]}/ ({data_dir})", flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
@@ -0,0 +1,123 @@
+import hashlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from .cache import file_key, frame_cache
+from .catalog import get_catalog
+from .config import DATA_DIR, PARQUET_DIR, STREAM_CHUNK_ROWS
+from .ingest import convert_file, sidecar_is_fresh, sidecar_path
+from .instrument import stage
+from .memory import compact
+
+
+# ===================== PARTITIONS ======================
+def partitions(category, data_dir=DATA_DIR):
+    # [(période, chemin .xlsx)] triés, une partition par fichier mensuel
+    return sorted(
+        (e["period"], e["path"]) for e in get_catalog(data_dir).entries(category) if e["period"]
+    )
+
+
+def list_periods(category, data_dir=DATA_DIR):
+    return [period for period, _ in partitions(category, data_dir)]
+
+
+def prune(parts, start, end):
+    # Élagage : les périodes "AAAA-MM" se comparent comme des chaînes
+    return [(period, path) for period, path in parts if start <= period <= end]
+
+
+# ==================== REQUÊTES PAR PLAGE ====================
+def _filter_expression(filters):
+    expr = None
+    for col, values in sorted(filters.items()):
+        if not values:
+            continue
+        cond = pc.field(col).isin(list(values))
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def stale_partitions(category, start, end, data_dir=DATA_DIR, parquet_dir=PARQUET_DIR):
+    # Mois de la plage dont le miroir Parquet manque ou est périmé
+    paths = [path for _, path in prune(partitions(category, data_dir), start, end)]
+    return [p for p in paths if not sidecar_is_fresh(p, sidecar_path(p, data_dir, parquet_dir))]
+
+
+def _ensure_sidecars(paths, data_dir, parquet_dir):
+    sidecars = []
+    for path in paths:
+        sidecar = sidecar_path(path, data_dir, parquet_dir)
+        if not sidecar_is_fresh(path, sidecar):
+            convert_file(path, data_dir, parquet_dir)
+        sidecars.append(sidecar)
+    return sidecars
+
+
+def _version(paths):
+    h = hashlib.sha1()
+    for path in paths:
+        h.update(repr(file_key(path)).encode())
+    return h.hexdigest()
+
+
+def read_range(category, start, end, columns=None, filters=None,
+               data_dir=DATA_DIR, parquet_dir=PARQUET_DIR):
+    # Lit les mois [start, end] d'une catégorie en une seule passe Arrow :
+    # seules les partitions de la plage et les colonnes demandées sont lues,
+    # et le filtre (dict colonne -> valeurs) est poussé au lecteur Parquet.
+    filters = filters or {}
+    paths = [path for _, path in prune(partitions(category, data_dir), start, end)]
+    if columns is not None:
+        columns = list(columns)
+
+    key = (
+        f"range://{category}",
+        start,
+        end,
+        tuple(columns) if columns is not None else None,
+        tuple((col, tuple(sorted(map(str, v)))) for col, v in sorted(filters.items()) if v),
+        _version(paths),
+    )
+    df = frame_cache.get(key)
+    if df is None:
+        sidecars = _ensure_sidecars(paths, data_dir, parquet_dir)
+        if sidecars:
+            with stage("lecture.periode") as info:
+                dataset = ds.dataset(sidecars, format="parquet")
+                table = dataset.to_table(columns=columns, filter=_filter_expression(filters))
+                df = compact(table.to_pandas())
+                info.update(rows=table.num_rows, bytes=table.nbytes)
+        else:
+            df = pd.DataFrame(columns=columns or [])
+        frame_cache.put(key, df)
+    return df.copy()
+
+
+def range_batches(category, start, end, columns=None, filters=None, batch_rows=STREAM_CHUNK_ROWS,
+                  data_dir=DATA_DIR, parquet_dir=PARQUET_DIR):
+    # Même lecture que read_range, mais par lots Arrow et sans cache : la plage
+    # n'est jamais entièrement en mémoire (exports de plusieurs années).
+    # Au moins un lot (éventuellement vide) pour que le schéma soit connu.
+    paths = [path for _, path in prune(partitions(category, data_dir), start, end)]
+    sidecars = _ensure_sidecars(paths, data_dir, parquet_dir)
+    if not sidecars:
+        # Aucun mois dans la plage : colonnes demandées sans type, comme read_range
+        schema = pa.schema([(col, pa.null()) for col in columns or []])
+        yield pa.RecordBatch.from_pylist([], schema=schema)
+        return
+    scanner = ds.dataset(sidecars, format="parquet").scanner(
+        columns=list(columns) if columns is not None else None,
+        filter=_filter_expression(filters or {}),
+        batch_size=batch_rows,
+    )
+    empty = True
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            empty = False
+            yield batch
+    if empty:
+        yield pa.RecordBatch.from_pylist([], schema=scanner.projected_schema)
@@ -0,0 +1,157 @@
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from .cache import LRUDict, file_key
+from .config import PROFILE_SAMPLE_ROWS, STREAM_CHUNK_ROWS, UPLOAD_DIR
+from .instrument import stage
+from .schema import coerce
+
+# Blocs de 1 Mo pour la copie des fichiers téléversés
+COPY_BUFFER = 1024 * 1024
+
+# Fichiers téléversés conservés au plus UPLOAD_MAX_AGE secondes et UPLOAD_MAX_FILES
+# fichiers ; un fichier purgé pendant une session est simplement réécrit.
+UPLOAD_MAX_AGE = 6 * 3600
+UPLOAD_MAX_FILES = 50
+
+# file_key du fichier sur disque -> StreamSummary
+_summary_cache = LRUDict(32)
+
+
+# ================== ÉCRITURE INCRÉMENTALE SUR DISQUE ==================
+def spool_upload(fileobj, upload_id, upload_dir=UPLOAD_DIR):
+    # Copie par blocs du fichier téléversé vers le disque, une seule fois par
+    # upload_id : les reruns suivants réutilisent le fichier déjà écrit.
+    path = os.path.join(upload_dir, f"{upload_id}.xlsx")
+    if not os.path.exists(path):
+        os.makedirs(upload_dir, exist_ok=True)
+        purge_uploads(upload_dir)
+        tmp = f"{path}.tmp"
+        fileobj.seek(0)
+        with open(tmp, "wb") as f:
+            shutil.copyfileobj(fileobj, f, COPY_BUFFER)
+        os.replace(tmp, path)
+    return path
+
+
+def purge_uploads(upload_dir=UPLOAD_DIR, max_age=UPLOAD_MAX_AGE, max_files=UPLOAD_MAX_FILES):
+    # Supprime les fichiers trop anciens, puis les plus anciens au-delà de max_files
+    files = []
+    for name in os.listdir(upload_dir):
+        path = os.path.join(upload_dir, name)
+        try:
+            files.append((os.path.getmtime(path), path))
+        except OSError:
+            pass
+    files.sort(reverse=True)
+    now = time.time()
+    for i, (mtime, path) in enumerate(files):
+        if i >= max_files or now - mtime > max_age:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# ===================== LECTURE PAR BLOCS DE LIGNES =====================
+def iter_excel_chunks(path, chunk_rows=STREAM_CHUNK_ROWS):
+    # openpyxl en lecture seule : les lignes sont lues au fil de l'eau et
+    # seul le bloc courant est converti en DataFrame.
+    # Ouvert via un descripteur : openpyxl ne regarde alors pas l'extension
+    # (cas des fichiers temporaires .upload de l'import admin).
+    from openpyxl import load_workbook  # chargé seulement pour lire un classeur
+
+    fh = open(path, "rb")
+    wb = load_workbook(fh, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+        buffer = []
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame.from_records(buffer, columns=columns)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame.from_records(buffer, columns=columns)
+    finally:
+        wb.close()
+        fh.close()
+
+
+# ====================== RÉSUMÉ CALCULÉ AU FIL DE L'EAU ======================
+class StreamSummary:
+    """Aperçu, échantillon et cumuls d'un classeur, en mémoire bornée."""
+
+    def __init__(self, preview_rows, sample_rows, group_sums, seed=0):
+        self.preview_rows = preview_rows
+        self.sample_rows = sample_rows
+        self.group_sums = list(group_sums)
+        self.n_rows = 0
+        self.preview = None
+        self.sample = None
+        self.sums = {}  # (colonne de regroupement, colonne sommée) -> Series
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk):
+        if self.preview is None or len(self.preview) < self.preview_rows:
+            head = chunk.head(self.preview_rows - (0 if self.preview is None else len(self.preview)))
+            self.preview = head if self.preview is None else pd.concat([self.preview, head], ignore_index=True)
+
+        for by, value in self.group_sums:
+            if by in chunk.columns and value in chunk.columns:
+                part = chunk[value].groupby(chunk[by], observed=True).sum()
+                prev = self.sums.get((by, value))
+                self.sums[(by, value)] = part if prev is None else prev.add(part, fill_value=0)
+
+        self._reservoir(chunk)
+        self.n_rows += len(chunk)
+
+    def _reservoir(self, chunk):
+        # Échantillonnage par réservoir (algorithme R) appliqué bloc par bloc
+        k = self.sample_rows
+        start = self.n_rows  # rang global de la première ligne du bloc
+        filled = 0 if self.sample is None else len(self.sample)
+        if filled < k:
+            take = chunk.iloc[: k - filled]
+            self.sample = take.reset_index(drop=True) if self.sample is None else pd.concat([self.sample, take], ignore_index=True)
+            chunk = chunk.iloc[len(take):]
+            start += len(take)
+        if chunk.empty:
+            return
+
+        # La ligne de rang i remplace un élément tiré au hasard avec une probabilité k / (i + 1)
+        slots = self._rng.integers(0, start + np.arange(len(chunk)) + 1)
+        accepted = np.flatnonzero(slots < k)
+        if len(accepted) == 0:
+            return
+        # Si un même élément est tiré plusieurs fois, la dernière ligne l'emporte
+        rev = accepted[::-1]
+        replaced, first = np.unique(slots[rev], return_index=True)
+        kept = self.sample.drop(index=replaced)
+        self.sample = pd.concat([kept, chunk.iloc[rev[first]]], ignore_index=True)
+
+
+def summarize_excel(path, schema, group_sums=(), preview_rows=5, sample_rows=PROFILE_SAMPLE_ROWS,
+                    chunk_rows=STREAM_CHUNK_ROWS):
+    # Chaque bloc est typé selon le schéma avant d'être résumé : les colonnes
+    # sommées sont donc numériques sans conversion supplémentaire
+    key = (file_key(path), schema.name, tuple(group_sums), preview_rows, sample_rows)
+    summary = _summary_cache.get(key)
+    if summary is None:
+        summary = StreamSummary(preview_rows, sample_rows, group_sums)
+        with stage("lecture.flux", nbytes=os.path.getsize(path)) as info:
+            for chunk in iter_excel_chunks(path, chunk_rows):
+                summary.update(coerce(chunk, schema))
+            info["rows"] = summary.n_rows
+        _summary_cache.put(key, summary)
+    return summary
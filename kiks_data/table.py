@@ -0,0 +1,39 @@
+from .cache import VERSION_ATTR, LRUDict
+from .instrument import count, stage
+
+# (version, colonne, ordre) -> permutation des lignes triées
+_order_cache = LRUDict(256)
+
+
+# ===================== TRI CÔTÉ SERVEUR =====================
+def sort_order(df, sort_by, ascending=True):
+    # Positions des lignes dans l'ordre demandé ; mises en cache par version
+    # du jeu de données pour que changer de page ne retrie pas tout.
+    version = df.attrs.get(VERSION_ATTR)
+    key = (version, sort_by, ascending)
+    if version is not None:
+        order = _order_cache.get(key)
+        if order is not None:
+            count("tri.hit")
+            return order
+    with stage("tri", rows=len(df)):
+        s = df[sort_by].reset_index(drop=True)
+        order = s.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+    if version is not None:
+        _order_cache.put(key, order)
+    return order
+
+
+# ======================== PAGINATION ========================
+def page_count(n_rows, page_size):
+    return max(1, -(-n_rows // page_size))
+
+
+def page(df, page_number, page_size, sort_by=None, ascending=True):
+    # Ne matérialise que la fenêtre visible (page_number commence à 1)
+    start = (page_number - 1) * page_size
+    stop = min(start + page_size, len(df))
+    if sort_by is None:
+        return df.iloc[start:stop]
+    return df.iloc[sort_order(df, sort_by, ascending)[start:stop]]
+
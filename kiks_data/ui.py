@@ -0,0 +1,440 @@
+# Composants Streamlit partagés par les pages app*.py.
+# Le reste du paquet kiks_data n'importe jamais streamlit.
+import os
+
+import pandas as pd
+import streamlit as st
+import streamlit.components.v1 as components
+
+from .analytics import CATEGORY, compare, query
+from .anomalies import anomalies
+from .cache import content_hash, file_key, frame_cache, frame_nbytes
+from .catalog import get_catalog
+from .charts import downsample, resample_series
+from .config import DATA_DIR
+from .cube import DIMENSIONS, MEASURE, daily_series, dimension_counts, histogram
+from .export import FORMATS, export, frame_chunks
+from .filters import apply_filters, distinct_values, filterable_columns
+from .indicators import INDICATOR_COLUMNS, indicators
+from .ingest import load_month, sidecar_is_fresh, sidecar_path
+from .instrument import current, history, stage
+from .jobs import job_queue
+from .memory import memory_report
+from .profiling import data_digest, report_html, submit_profile
+from .pipeline import convert_files
+from .search import search, search_rows
+from .store import list_periods, range_batches, read_range, stale_partitions
+from .table import page, page_count
+
+_NO_SORT = "(ordre du fichier)"
+
+
+def _px():
+    # plotly.express n'est importé qu'au premier graphique (préchargé par warmup)
+    import plotly.express as px
+
+    return px
+
+
+# ==================== TABLEAU PAGINÉ ====================
+def paged_table(df, key="table"):
+    # Remplace st.dataframe(df) : seule la page visible est envoyée au navigateur
+    c1, c2, c3, c4 = st.columns([2, 2, 1, 1])
+    sort_by = c1.selectbox("Trier par", [_NO_SORT] + df.columns.tolist(), key=f"{key}_tri")
+    descending = c2.toggle("Ordre décroissant", key=f"{key}_desc") if sort_by != _NO_SORT else False
+    page_size = c3.selectbox("Lignes / page", [25, 50, 100, 500], index=1, key=f"{key}_taille")
+    n_pages = page_count(len(df), page_size)
+    # Après un filtre, la page mémorisée peut dépasser le nouveau nombre de pages
+    if st.session_state.get(f"{key}_page", 1) > n_pages:
+        st.session_state[f"{key}_page"] = n_pages
+    page_number = c4.number_input("Page", min_value=1, max_value=n_pages, step=1, key=f"{key}_page")
+
+    window = page(df, int(page_number), page_size,
+                  sort_by=None if sort_by == _NO_SORT else sort_by, ascending=not descending)
+    with stage("st.dataframe", rows=len(window), nbytes=frame_nbytes(window)):
+        st.dataframe(window)
+    first = (int(page_number) - 1) * page_size
+    st.caption(f"Lignes {first + 1 if len(df) else 0}–{first + len(window)} sur {len(df)} · page {int(page_number)}/{n_pages}")
+
+
+# ======================== FILTRES ========================
+def filter_panel(df, key_prefix="filtre"):
+    selections = {}
+    for col in filterable_columns(df):
+        selections[col] = st.multiselect(
+            f"Filtrer {col}", options=distinct_values(df, col), key=f"{key_prefix}_{col}"
+        )
+    return apply_filters(df, selections)
+
+
+# ========================= EXPORT =========================
+def _download_button(path, fmt, file_name, key):
+    mime, ext = FORMATS[fmt]
+    with open(path, "rb") as f:
+        st.download_button(f"⬇️ {ext.upper()}", f, file_name=f"{file_name}.{ext}", mime=mime, key=key)
+
+
+def export_panel(source, file_name, key="export", on_demand=True):
+    # source : DataFrame déjà en mémoire, ou fonction renvoyant des blocs
+    # (DataFrame / lots Arrow). Le fichier est écrit bloc par bloc sur disque.
+    # on_demand=False : petits agrégats (DataFrame), un bouton par format prêt
+    # tout de suite, sans clic préalable. Les fichiers sont réutilisés tant
+    # que le contenu ne change pas.
+    def chunks():
+        return frame_chunks(source) if isinstance(source, pd.DataFrame) else source()
+
+    if not on_demand:
+        digest = content_hash(source)
+        for col, fmt in zip(st.columns(len(FORMATS)), FORMATS):
+            with col:
+                path, _ = export(chunks(), fmt, name=key, digest=digest)
+                _download_button(path, fmt, file_name, f"{key}_{fmt}")
+        return
+
+    c1, c2 = st.columns([1, 3])
+    fmt = c1.selectbox("Format d'export", list(FORMATS), key=f"{key}_format")
+    c2.write("")
+    if c2.button("📥 Préparer l'export", key=f"{key}_preparer"):
+        with st.spinner("Écriture du fichier…"):
+            path, rows = export(chunks(), fmt, name=key)
+        st.caption(f"{rows} lignes exportées")
+        _download_button(path, fmt, file_name, f"{key}_telecharger")
+
+
+# ================== ANALYSE SUR UNE PÉRIODE ==================
+def month_view(path, data_dir=DATA_DIR):
+    # Mois sélectionné : un fichier jamais converti est lu depuis l'Excel en
+    # arrière-plan (conversion, cube, index) ; None tant que la tâche tourne.
+    if frame_cache.peek(file_key(path)) is None and not sidecar_is_fresh(path, sidecar_path(path, data_dir)):
+        job_id = job_queue.submit(
+            ("conversion", (file_key(path),)), convert_files, [path], data_dir,
+            label=f"Conversion de {os.path.basename(path)}", with_progress=True,
+        )
+        if wait_for_job(job_id) is None:
+            return None
+    return load_month(path)
+
+
+def range_view(category, data_dir=DATA_DIR):
+    periods = list_periods(category, data_dir)
+    if not periods:
+        st.info("Aucun fichier mensuel pour cette catégorie.")
+        return
+
+    start, end = st.select_slider(
+        "📆 Période :", options=periods, value=(periods[0], periods[-1]), key="range_periode"
+    )
+    # Les mois jamais convertis sont lus depuis l'Excel en arrière-plan,
+    # une seule fois même si plusieurs sessions demandent la même plage.
+    stale = stale_partitions(category, start, end, data_dir)
+    if stale:
+        job_id = job_queue.submit(
+            ("conversion", tuple(file_key(p) for p in stale)), convert_files, stale, data_dir,
+            label=f"Conversion de {len(stale)} mois", with_progress=True,
+        )
+        if wait_for_job(job_id) is None:
+            return
+    # Colonnes disponibles : lues sur un seul mois (mis en cache)
+    all_columns = read_range(category, periods[-1], periods[-1], data_dir=data_dir).columns.tolist()
+    columns = st.multiselect("🧱 Colonnes :", options=all_columns, default=all_columns, key="range_colonnes")
+
+    filters = {}
+    if "OPERATEUR" in all_columns:
+        operateurs = read_range(category, start, end, columns=["OPERATEUR"], data_dir=data_dir)["OPERATEUR"]
+        choix = st.multiselect("🏢 Opérateur :", options=sorted(operateurs.dropna().unique()), key="range_operateur")
+        if choix:
+            filters["OPERATEUR"] = choix
+
+    df = read_range(category, start, end, columns=columns or None, filters=filters, data_dir=data_dir)
+    st.caption(f"{len(df)} lignes de {start} à {end}")
+    paged_table(df, key="range_table")
+    # Relu par lots depuis les miroirs Parquet : plusieurs années sans copie complète
+    export_panel(
+        lambda: range_batches(category, start, end, columns=columns or None, filters=filters, data_dir=data_dir),
+        f"{category}_{start}_{end}", key="export_periode",
+    )
+
+    if "DATE" in df.columns and "TONNAGE" in df.columns:
+        dates = df.dropna(subset=["DATE"])
+        tendance = dates.groupby(dates["DATE"].dt.to_period("M").astype(str))["TONNAGE"].sum().reset_index()
+        fig = _px().line(tendance, x="DATE", y="TONNAGE", markers=True, title=f"Évolution mensuelle du TONNAGE ({start} → {end})")
+        plotly_chart(fig)
+
+
+# ================= INDICATEURS MENSUELS =================
+_INDICATOR_LABELS = {
+    "valeur": "Total du mois", "mom": "Variation sur 1 mois (MoM)", "yoy": "Variation sur 1 an (YoY)",
+    "mm3": "Moyenne mobile 3 mois", "mm12": "Moyenne mobile 12 mois",
+}
+
+
+def indicators_panel(category, data_dir=DATA_DIR):
+    table = indicators(category, data_dir)
+    if table.empty:
+        st.info("Aucune série mensuelle pour cette catégorie.")
+        return
+
+    c1, c2, c3 = st.columns(3)
+    mesure = c1.selectbox("Mesure", sorted(table["mesure"].unique()), key="indic_mesure")
+    flux = c2.multiselect("Flux", sorted(table["FLUX"].unique()), key="indic_flux")
+    indicateur = c3.selectbox("Indicateur", ["valeur", *INDICATOR_COLUMNS],
+                              format_func=_INDICATOR_LABELS.get, key="indic_type")
+    produits = st.multiselect("Produits (DESIGNATION)", sorted(table["DESIGNATION"].unique()), key="indic_produits")
+
+    part = table[table["mesure"] == mesure]
+    if flux:
+        part = part[part["FLUX"].isin(flux)]
+    if produits:
+        part = part[part["DESIGNATION"].isin(produits)]
+    serie = part.assign(serie=part["DESIGNATION"] + " · " + part["FLUX"])
+    fig = _px().line(serie, x="period", y=indicateur, color="serie", markers=True,
+                  title=f"{_INDICATOR_LABELS[indicateur]} — {mesure}",
+                  labels={"period": "Mois", indicateur: _INDICATOR_LABELS[indicateur]})
+    if indicateur in ("mom", "yoy"):
+        fig.update_yaxes(tickformat=".0%")
+    plotly_chart(fig)
+
+    dernier = part["period"].max()
+    st.markdown(f"**Dernier mois : {dernier}**")
+    st.dataframe(part[part["period"] == dernier].drop(columns=["period", "mesure"]), hide_index=True)
+
+
+# ============= COMPARAISONS ET CLASSEMENTS =============
+def analytics_panel(data_dir=DATA_DIR):
+    catalog = get_catalog(data_dir)
+    categories = st.multiselect("📁 Catégories :", catalog.categories(), default=catalog.categories(),
+                                key="analyse_categories")
+    periods = sorted({e["period"] for e in catalog.entries() if e["category"] in categories and e["period"]})
+    if not periods:
+        st.info("Aucun fichier mensuel pour ces catégories.")
+        return
+    start, end = st.select_slider("📆 Période :", options=periods, value=(periods[0], periods[-1]),
+                                  key="analyse_periode")
+
+    c1, c2, c3 = st.columns([3, 1, 2])
+    by = c1.multiselect("Regrouper par", DIMENSIONS, default=["OPERATEUR"], key="analyse_par")
+    n = c2.number_input("Top N", min_value=1, max_value=100, value=10, key="analyse_n")
+    par_categorie = c3.toggle("Classement par catégorie", key="analyse_par_categorie")
+    if not by:
+        return
+
+    within = [CATEGORY] if par_categorie else None
+    result = query(categories, start, end, by, n=int(n), within=within, data_dir=data_dir)
+    st.dataframe(result.assign(part=(result["part"] * 100).round(2)).rename(columns={"part": "part (%)"}),
+                 hide_index=True)
+    label = " · ".join(by)
+    fig = _px().bar(result.assign(**{label: result[by].astype(str).agg(" · ".join, axis=1)}),
+                 x=label, y="somme", color=CATEGORY, title=f"Top {int(n)} {label} par {MEASURE}",
+                 labels={"somme": MEASURE})
+    plotly_chart(fig)
+
+    if len(categories) > 1 and len(by) == 1:
+        st.markdown(f"**{MEASURE} par {by[0]} et par catégorie**")
+        st.dataframe(compare(categories, start, end, by[0], data_dir=data_dir))
+
+
+# ======================= ANOMALIES =======================
+_ANOMALY_TYPES = {"ligne": "Lignes aberrantes", "rupture": "Ruptures mensuelles"}
+
+
+def anomalies_panel(data_dir=DATA_DIR):
+    # Lecture des tables calculées à l'ingestion : aucun fichier brut relu
+    catalog = get_catalog(data_dir)
+    c1, c2 = st.columns([3, 2])
+    categories = c1.multiselect("📁 Catégories :", catalog.categories(), default=catalog.categories(),
+                                key="anomalies_categories")
+    kind = c2.radio("Type", list(_ANOMALY_TYPES), format_func=_ANOMALY_TYPES.get, horizontal=True,
+                    key="anomalies_type")
+    if not categories:
+        return
+    table = anomalies(categories, kind=kind, data_dir=data_dir)
+    if table.empty:
+        st.info("Aucune anomalie détectée.")
+        return
+
+    periods = sorted(table["period"].unique())
+    if len(periods) > 1:
+        start, end = st.select_slider("📆 Période :", options=periods, value=(periods[0], periods[-1]),
+                                      key="anomalies_periode")
+        table = table[(table["period"] >= start) & (table["period"] <= end)]
+    st.metric("Anomalies", len(table))
+    if kind == "ligne":
+        columns = ["catégorie", "period", "N°", "DATE", "OPERATEUR", "DESIGNATION", "BUREAU", "FLUX",
+                   "valeur", "reference", "score", "methode"]
+    else:
+        columns = ["catégorie", "period", "mesure", "DESIGNATION", "FLUX", "valeur", "reference", "score", "methode"]
+    paged_table(table[columns].rename(columns={"reference": "médiane"}).reset_index(drop=True),
+                key="anomalies_table")
+
+
+# ============ GRAPHIQUES DU TABLEAU DE BORD (depuis le cube) ============
+def histogram_figure(cube, title):
+    with stage("graphique.histogramme"):
+        h = histogram(cube)
+        h["centre"] = (h["debut"] + h["fin"]) / 2
+        fig = _px().bar(h, x="centre", y="nb", title=title, labels={"centre": MEASURE, "nb": "Nombre de lignes"})
+        fig.update_layout(bargap=0)
+    return fig
+
+
+def counts_figure(cube, dim, title):
+    with stage("graphique.repartition"):
+        counts = dimension_counts(cube, dim)
+        return _px().bar(counts, x=dim, y="nb", title=title, labels={"nb": "Nombre de lignes"})
+
+
+def series_figure(cube, title, freq="D"):
+    # Cumul par pas de temps puis LTTB : la taille du graphique reste bornée
+    with stage("graphique.serie") as info:
+        serie = resample_series(daily_series(cube), freq)
+        serie = downsample(serie, "DATE", "somme")
+        info["rows"] = len(serie)
+        return _px().line(serie, x="DATE", y="somme", title=title, labels={"somme": MEASURE})
+
+
+def plotly_chart(fig):
+    # st.plotly_chart chronométré (sérialisation JSON de la figure)
+    with stage("st.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+# ================= TÂCHES EN ARRIÈRE-PLAN =================
+@st.fragment(run_every=1.0)
+def _job_progress(job_id):
+    job = job_queue.get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    fraction, step = job.progress()
+    st.progress(fraction, text=f"⏳ {job.label} : {step}…")
+
+
+def wait_for_job(job_id):
+    # Affiche la progression tant que la tâche tourne ; renvoie la tâche
+    # terminée avec succès, sinon None (la page reste utilisable).
+    job = job_queue.get(job_id)
+    if job is None:
+        return None
+    if not job.done:
+        _job_progress(job_id)
+        return None
+    if job.error:
+        st.error(f"{job.label} : {job.error}")
+        return None
+    return job
+
+
+def jobs_panel():
+    rows = job_queue.table()
+    if rows:
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+    else:
+        st.caption("Aucune tâche en arrière-plan.")
+
+
+# ======================= PROFILING =======================
+def profile_panel(df, key="profiling", auto=False, label="🧬 Profiling complet du dataset", total_rows=None):
+    # Le rapport est calculé en arrière-plan ; la page reste utilisable et
+    # affiche la progression, puis le rapport (relu du cache s'il existe).
+    if df is None or df.empty:
+        st.info("Aucune ligne de données : pas de rapport de profiling.")
+        return
+    requested = auto or st.button(label, key=f"{key}_bouton")
+    if not requested and key not in st.session_state:
+        return  # Aucun rapport demandé : pas d'empreinte à calculer (tri, pages, filtres)
+    # Empreinte calculée une seule fois par relance
+    digest = data_digest(df)
+    if requested:
+        st.session_state[key] = submit_profile(df, total_rows=total_rows, digest=digest)
+
+    job_id = st.session_state.get(key)
+    job = job_queue.get(job_id) if job_id else None
+    if job is None or job.meta["digest"] != digest:
+        return  # Pas de rapport demandé pour ces données
+    job = wait_for_job(job_id)
+    if job is not None:
+        html = report_html(job)
+        if html is None:
+            # Rapport supprimé du disque depuis le calcul : nouvelle tâche
+            st.session_state[key] = submit_profile(df, total_rows=total_rows, digest=digest)
+            st.rerun()
+        if job.meta["sampled"]:
+            st.info(f"Rapport minimal calculé sur un échantillon de lignes ({job.meta['n_rows']} lignes au total).")
+        components.html(html, height=1000, scrolling=True)
+
+
+# ======================= RECHERCHE =======================
+def search_panel(data_dir=DATA_DIR):
+    query = st.text_input("🔍 Rechercher un produit, un opérateur, une province, un bureau ou un pays", key="recherche")
+    if not query.strip():
+        return
+    values, per_month = search(query, data_dir)
+    if values.empty:
+        st.info("Aucun résultat.")
+        return
+
+    st.caption(f"{int(values['nb'].sum())} lignes dans {len(per_month)} fichiers mensuels")
+    st.dataframe(values, hide_index=True)
+    fig = _px().bar(per_month, x="period", y="nb", color="category", title="Occurrences par mois",
+                 labels={"period": "Mois", "nb": "Lignes", "category": "Catégorie"})
+    plotly_chart(fig)
+    if st.checkbox("Afficher les lignes trouvées", key="recherche_lignes"):
+        paged_table(search_rows(query, data_dir=data_dir), key="recherche_table")
+
+
+# ================== PERFORMANCES (ADMIN) ==================
+def _stages_frame(record):
+    return pd.DataFrame([
+        {
+            "étape": "  " * s["depth"] + s["stage"],
+            "ms": None if s["seconds"] is None else round(s["seconds"] * 1000, 2),
+            "lignes": s["rows"],
+            "octets": s["bytes"],
+        }
+        for s in record["stages"]
+    ])
+
+
+def debug_panel():
+    # Étapes de la relance en cours (jusqu'à ce panneau) et points chauds
+    # des dernières relances de toutes les sessions
+    trace = current()
+    if trace is not None:
+        record = trace.as_record()
+        st.caption(f"Relance en cours : {record['seconds'] * 1000:.0f} ms jusqu'ici · "
+                   f"cache {record['counters'].get('cache.hit', 0)} hit / {record['counters'].get('cache.miss', 0)} miss")
+        if record["stages"]:
+            st.dataframe(_stages_frame(record), hide_index=True)
+
+    records = list(history)
+    if not records:
+        return
+    st.markdown("**Dernières relances**")
+    st.dataframe(pd.DataFrame([
+        {"page": r["page"], "ms": round(r["seconds"] * 1000, 1), "étapes": len(r["stages"]),
+         "cache hit": r["counters"].get("cache.hit", 0), "cache miss": r["counters"].get("cache.miss", 0)}
+        for r in reversed(records)
+    ]), hide_index=True)
+
+    stages = pd.DataFrame([s for r in records for s in r["stages"] if s["seconds"] is not None])
+    if not stages.empty:
+        st.markdown("**Points chauds**")
+        hot = stages.groupby("stage")["seconds"].agg(appels="size", total="sum", max="max")
+        hot[["total", "max"]] = (hot[["total", "max"]] * 1000).round(1)
+        st.dataframe(hot.sort_values("total", ascending=False).head(10).rename(
+            columns={"total": "total (ms)", "max": "max (ms)"}))
+
+
+def memory_panel():
+    # Jeux de données en cache mémoire et détail par colonne du jeu choisi
+    stats = frame_cache.stats()
+    st.caption(f"Cache : {stats['entries']} jeux de données · {stats['bytes'] / 2**20:.1f} / "
+               f"{stats['max_bytes'] / 2**20:.0f} Mo")
+    entries = frame_cache.report()
+    if not entries:
+        return
+    st.dataframe(pd.DataFrame([{k: v for k, v in e.items() if k != "cle"} for e in entries]), hide_index=True)
+    labels = [f"{e['source']} ({e['lignes']} lignes)" for e in entries]
+    choix = st.selectbox("Détail par colonne", range(len(entries)), format_func=labels.__getitem__, key="memoire_jeu")
+    df = frame_cache.peek(entries[choix]["cle"])
+    if df is not None:
+        st.dataframe(memory_report(df), hide_index=True)
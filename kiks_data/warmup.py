@@ -0,0 +1,81 @@
+import importlib
+import logging
+import os
+import threading
+import time
+
+from .anomalies import detect
+from .catalog import get_catalog
+from .config import DATA_DIR, WARMUP_MONTHS
+from .cube import month_cube
+from .indicators import update_indicators
+from .ingest import load_month
+from .store import partitions
+
+# Modules lourds utiles dès la première page. ydata_profiling n'y figure pas :
+# il est importé par les processus de travail du profiling, pas par le serveur.
+PRELOAD_MODULES = ("plotly.express",)
+
+logger = logging.getLogger(__name__)
+_started = set()
+_lock = threading.Lock()
+
+
+# ===================== PRÉCHARGEMENT =====================
+def hot_months(data_dir=DATA_DIR, months=WARMUP_MONTHS):
+    # Les derniers mois de chaque catégorie : ceux que les pages ouvrent en premier
+    catalog = get_catalog(data_dir)
+    return [path for c in catalog.categories() for _, path in partitions(c, data_dir)[-months:]]
+
+
+def warm_up(data_dir=DATA_DIR, months=WARMUP_MONTHS, modules=PRELOAD_MODULES):
+    # Catalogue, mois récents (miroir Parquet, cache mémoire, cube), indicateurs
+    # et anomalies, puis modules lourds. Renvoie la durée de chaque étape.
+    timings = {}
+    t0 = time.perf_counter()
+    catalog = get_catalog(data_dir)
+    catalog.refresh(force=True)
+    timings["catalogue"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    paths = hot_months(data_dir, months) if months > 0 else []
+    for path in paths:
+        load_month(path)
+        month_cube(path, data_dir)
+    timings[f"mois ({len(paths)})"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for category in sorted({e["category"] for e in catalog.entries() if e["period"]}):
+        update_indicators(category, data_dir)
+        detect(category, data_dir)
+    timings["indicateurs et anomalies"] = time.perf_counter() - t0
+
+    for name in modules:
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        timings[name] = time.perf_counter() - t0
+    return timings
+
+
+def _run(data_dir):
+    try:
+        timings = warm_up(data_dir)
+        logger.info("préchargement terminé : %s", {k: round(v, 3) for k, v in timings.items()})
+    except Exception:
+        logger.exception("préchargement interrompu")
+
+
+def start_warmup(data_dir=DATA_DIR):
+    # Une seule fois par processus et en arrière-plan : appelé en tête de page,
+    # il ne retarde pas l'affichage de la connexion.
+    key = os.path.abspath(data_dir)
+    with _lock:
+        if WARMUP_MONTHS <= 0 or key in _started:
+            return None
+        _started.add(key)
+    thread = threading.Thread(target=_run, args=(data_dir,), name="kiks-warmup", daemon=True)
+    thread.start()
+    return thread